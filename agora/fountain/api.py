@@ -24,6 +24,7 @@
 
 import json
 import os
+from functools import partial
 
 from flask import make_response, request, jsonify, render_template, url_for
 from flask_negotiate import consumes
@@ -31,8 +32,9 @@ from flask_negotiate import consumes
 import agora.fountain
 import agora.fountain.index.core as index
 import agora.fountain.index.seeds as seeds
+import agora.fountain.jobs as jobs
 import agora.fountain.vocab.onto as vocs
-from agora.fountain.index.paths import calculate_paths, find_path
+from agora.fountain.index.paths import calculate_paths, find_path, path_limits, cycle_components
 from agora.fountain.server import app
 from agora.fountain.view.graph import view_graph
 from agora.fountain.view.path import view_path
@@ -70,6 +72,12 @@ class Conflict(APIError):
         super(Conflict, self).__init__(message, 409, payload)
 
 
+@app.before_request
+def check_index_generation():
+    if request.endpoint != 'get_readiness':
+        index.check_generation()
+
+
 @app.errorhandler(APIError)
 def handle_invalid_usage(error):
     response = jsonify(error.to_dict())
@@ -86,6 +94,14 @@ def get_api():
                     'types': url_for('get_types', _external=True)})
 
 
+@app.route('/ready')
+def get_readiness():
+    ready = index.is_ready()
+    response = jsonify({'ready': ready})
+    response.status_code = 200 if ready else 503
+    return response
+
+
 @app.route('/vocabs')
 def get_vocabularies():
     """
@@ -113,10 +129,30 @@ def get_vocabulary(vid):
     return response
 
 
-def __analyse_vocabularies(vids):
-    for vid in reversed(vids):
-        index.extract_vocabulary(vid)
-    calculate_paths()
+def __analyse_vocabularies(operation, vids, check_seeds=False):
+    """
+    Run the analysis of the given vocabularies in the background worker. Unless the client prefers an
+    asynchronous response (Prefer: respond-async), wait for it to finish.
+    :param operation:
+    :param vids:
+    :param check_seeds: Whether seeds of types that are no longer known have to be removed afterwards
+    :return: The job id, if the analysis was left running
+    """
+    stages = [('extract:{}'.format(vid), partial(index.extract_vocabulary, vid)) for vid in reversed(vids)]
+    stages.append(('paths', lambda _: calculate_paths()))
+    if check_seeds:
+        stages.append(('seeds', lambda _: __check_seeds()))
+    jid, future = jobs.submit(operation, vids, stages)
+    if 'respond-async' in request.headers.get('Prefer', ''):
+        return jid
+    future.result()
+
+
+def __accepted(jid):
+    response = jsonify(jobs.get_job(jid))
+    response.status_code = 202
+    response.headers['Location'] = url_for('get_job', jid=jid, _external=True)
+    return response
 
 
 def __check_seeds():
@@ -143,7 +179,9 @@ def add_vocabulary():
     except vocs.VocabularyException, e:
         raise APIError(e)
 
-    __analyse_vocabularies(vids)
+    jid = __analyse_vocabularies('add', list(vids))
+    if jid is not None:
+        return __accepted(jid)
 
     response = make_response()
     response.status_code = 201
@@ -167,8 +205,9 @@ def update_vocabulary(vid):
     except Exception, e:
         raise APIError(e.message)
 
-    __analyse_vocabularies([vid])
-    __check_seeds()
+    jid = __analyse_vocabularies('update', [vid], check_seeds=True)
+    if jid is not None:
+        return __accepted(jid)
 
     response = make_response()
     response.status_code = 200
@@ -188,14 +227,28 @@ def delete_vocabulary(vid):
     except vocs.UnknownVocabulary, e:
         raise NotFound(e.message)
 
-    __analyse_vocabularies([vid])
-    __check_seeds()
+    jid = __analyse_vocabularies('delete', [vid], check_seeds=True)
+    if jid is not None:
+        return __accepted(jid)
 
     response = make_response()
     response.status_code = 200
     return response
 
 
+@app.route('/jobs/<jid>')
+def get_job(jid):
+    """
+    Return the status, progress, stage timings and error (if any) of a vocabulary analysis job
+    :param jid:
+    :return:
+    """
+    job = jobs.get_job(jid)
+    if job is None:
+        raise NotFound('Unknown job: {}'.format(jid))
+    return jsonify(job)
+
+
 @app.route('/prefixes')
 def get_prefixes():
     """
@@ -214,6 +267,19 @@ def get_types():
     return jsonify({"types": index.get_types()})
 
 
+@app.route('/types', methods=['POST'])
+@consumes('application/json')
+def get_types_bulk():
+    """
+    Return the description of several types at once
+    :return: A dictionary of prefixed type -> description, for the known types of the requested list
+    """
+    types = request.json
+    if not isinstance(types, list) or not all([isinstance(_, basestring) for _ in types]):
+        raise APIError('A list of prefixed types was expected')
+    return jsonify({"types": index.get_types_bulk(types)})
+
+
 @app.route('/types/<string:t>')
 def get_type(t):
     """
@@ -233,6 +299,19 @@ def get_properties():
     return jsonify({"properties": index.get_properties()})
 
 
+@app.route('/properties', methods=['POST'])
+@consumes('application/json')
+def get_properties_bulk():
+    """
+    Return the description of several properties at once
+    :return: A dictionary of prefixed property -> description, for the known properties of the requested list
+    """
+    props = request.json
+    if not isinstance(props, list) or not all([isinstance(_, basestring) for _ in props]):
+        raise APIError('A list of prefixed properties was expected')
+    return jsonify({"properties": index.get_properties_bulk(props)})
+
+
 @app.route('/properties/<string:prop>')
 def get_property(prop):
     """
@@ -329,11 +408,20 @@ def get_path(elm):
                                    nodes=json.dumps(nodes),
                                    edges=json.dumps(edges), roots=json.dumps(roots))
         else:
-            return jsonify({'paths': seed_paths, 'all-cycles': all_cycles})
+            return jsonify({'paths': seed_paths, 'all-cycles': all_cycles, 'limits': path_limits(elm)})
     except seeds.TypeNotAvailableError, e:
         raise APIError(e.message)
 
 
+@app.route('/cycles')
+def get_cycle_components():
+    """
+    Return the strongly connected components of the graph that contain cycles, with the ids of their cycles
+    :return:
+    """
+    return jsonify({'components': cycle_components()})
+
+
 @app.route('/graph/')
 def show_graph():
     nodes, edges, roots = view_graph()
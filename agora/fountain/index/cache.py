@@ -0,0 +1,85 @@
+"""
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  This file is part of the Smart Developer Hub Project:
+    http://www.smartdeveloperhub.org
+
+  Center for Open Middleware
+        http://www.centeropenmiddleware.com/
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Copyright (C) 2015 Center for Open Middleware.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this file except in compliance with the License.
+  You may obtain a copy of the License at 
+
+            http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+"""
+
+from collections import OrderedDict
+from threading import RLock
+
+__author__ = 'Fernando Serena'
+
+
+class LRUCache(object):
+    """
+    A bounded, thread-safe dictionary that evicts the least recently used entries first
+    """
+
+    def __init__(self, size):
+        self.__size = size
+        self.__items = OrderedDict()
+        self.__lock = RLock()
+
+    def get(self, key, default=None):
+        """
+
+        :param key:
+        :param default:
+        :return:
+        """
+        with self.__lock:
+            try:
+                value = self.__items.pop(key)
+            except KeyError:
+                return default
+            self.__items[key] = value
+            return value
+
+    def set(self, key, value):
+        """
+
+        :param key:
+        :param value:
+        :return:
+        """
+        if self.__size <= 0:
+            return
+        with self.__lock:
+            self.__items.pop(key, None)
+            self.__items[key] = value
+            while len(self.__items) > self.__size:
+                self.__items.popitem(last=False)
+
+    def clear(self):
+        """
+
+        :return:
+        """
+        with self.__lock:
+            self.__items.clear()
+
+    def __contains__(self, key):
+        with self.__lock:
+            return key in self.__items
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__items)
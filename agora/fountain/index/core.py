@@ -21,159 +21,381 @@
   limitations under the License.
 #-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
 """
+import json
 import logging
-import multiprocessing
-import sys
 from datetime import datetime as dt
 
 import redis
-from concurrent.futures.thread import ThreadPoolExecutor
 from redis.exceptions import RedisError, BusyLoadingError
 
 import agora.fountain.vocab.onto as vocs
 import agora.fountain.vocab.schema as sch
 from agora.fountain.exceptions import FountainError
+from agora.fountain.index.cache import LRUCache
+from agora.fountain.index.memory import MemoryStore
+from agora.fountain.lazy import LazyObject
 from agora.fountain.server import app
 
 __author__ = 'Fernando Serena'
 
 log = logging.getLogger('agora.fountain.index')
 
-redis_conf = app.config['REDIS']
-pool = redis.ConnectionPool(host=redis_conf.get('host'), port=redis_conf.get('port'), db=redis_conf.get('db'))
-r = redis.StrictRedis(connection_pool=pool)
-tpool = ThreadPoolExecutor(multiprocessing.cpu_count())
 
+def __connect():
+    """
+    Create the index store client: either a Redis server (default) or an embedded in-memory store
+    :return:
+    """
+    if app.config.get('INDEX_STORE', 'redis') == 'memory':
+        log.info('Using an embedded in-memory index store')
+        return MemoryStore()
 
-log.info('Trying to connect to Redis at {}'.format(redis_conf))
-# Ping redis to check if it's ready
-requests = 0
-while True:
-    log.info('Checking Redis... ({})'.format(requests))
-    requests += 1
+    redis_conf = app.config['REDIS']
+    pool = redis.ConnectionPool(host=redis_conf.get('host'), port=redis_conf.get('port'), db=redis_conf.get('db'))
+    client = redis.StrictRedis(connection_pool=pool)
+
+    log.info('Trying to connect to Redis at {}'.format(redis_conf))
+    # Ping redis to check if it's ready. While it is loading its dataset it is not, and the connection is
+    # tried again on the next use of the index instead of blocking it (and every other request) meanwhile
     try:
-        r.keys('*')
-        break
-    except BusyLoadingError as re:
-        log.warning(re.message)
-    except RedisError:
-        print 'Redis is not available'
-        sys.exit(-1)
+        client.ping()
+    except BusyLoadingError as e:
+        log.warning(e.message)
+        raise FountainError('Redis is loading its dataset: {}'.format(e.message))
+    except RedisError as e:
+        raise FountainError('Redis is not available: {}'.format(e.message))
+    return client
+
 
-store_mode = app.config['STORE']
-if 'memory' in store_mode:
-    r.flushdb()
+# Version of the index layout, used to upgrade indexes written by previous versions on start-up
+INDEX_VERSION = 4
+VERSION_KEY = 'index:version'
+
+# Set of the vocabularies that have terms in the index
+VOCABS_KEY = 'index:vocabs'
+
+TYPE_FACETS = ['super', 'sub', 'props', 'refs']
+PROPERTY_FACETS = ['_domain', '_range', '_inverse', '_type']
+# Facets whose members are tracked in the reverse-dependency index (mentions:<term>). Inverses are tracked so
+# that the properties that derive their domain and range from others can be found from them.
+TRACKED_FACETS = {'types': TYPE_FACETS, 'properties': ['_domain', '_range', '_inverse']}
+# Facets from which the exclusive types and properties of a vocabulary are swept when it is deleted
+SWEPT_FACETS = {'types': ['_domain', '_range', 'sub', 'super'], 'properties': ['refs', 'props']}
+
+# Storage layout of the per-vocabulary term facets: 'sets' keeps one Redis set per facet, while 'compact'
+# packs all facets of a term into a single field of a per-vocabulary hash (vocabs:<vid>:<kind>:records).
+# The layout of an existing index is recorded in it and prevails over the configured one.
+LAYOUTS = ['sets', 'compact']
+LAYOUT_KEY = 'index:layout'
+# While a layout migration is running, its target and the vocabularies that were already rewritten are kept
+# apart from the layout key, so that an interrupted migration can be resumed by running it again
+MIGRATION_KEY = 'index:layout-migration'
+MIGRATED_KEY = 'index:layout-migrated'
+
+
+def __get_layout():
+    """
+    Return the storage layout of the index, once the store has been set up
+    :return:
+    """
+    r.get_object()
+    return layout
 
 
-def __get_by_pattern(pattern, func):
+def __stored_layout():
     """
 
-    :param pattern:
-    :param func:
     :return:
     """
+    stored = r.get(LAYOUT_KEY)
+    if stored is None:
+        stored = app.config.get('INDEX_LAYOUT', 'sets')
+        r.set(LAYOUT_KEY, stored)
+    if stored not in LAYOUTS:
+        raise FountainError('Unknown index layout: {}'.format(stored))
+    return stored
+
 
-    def get_all():
-        for k in pkeys:
-            yield func(k)
+layout = None
 
+# Descriptions are cached in-process while the generation stored in Redis stays the same. Cache keys include
+# the generation that was current before reading them, so that values read while the index was being modified
+# are never served after the modification.
+GENERATION_KEY = 'index:generation'
+cache = LRUCache(app.config.get('INDEX_CACHE_SIZE', 0))
+generation = None
+
+
+def check_generation():
+    """
+    Drop every cached description if the index has been modified since they were read (by any node)
+    :return: The current index generation
+    """
+    global generation, layout
     try:
-        pkeys = r.keys(pattern)
-        return list(get_all())
+        current = r.get(GENERATION_KEY)
+        if current != generation:
+            cache.clear()
+            generation = current
+            layout = __stored_layout()
     except RedisError as e:
         raise FountainError(e.message)
+    return generation
 
 
-def __remove_from_sets(values, *args):
+def __bump_generation():
     """
-
-    :param values:
-    :param args:
+    Mark the index as modified so that all nodes drop their cached descriptions
     :return:
     """
+    global generation
     try:
-        for pattern in args:
-            keys = r.keys(pattern)
-            for dk in keys:
-                key_parts = dk.split(':')
-                ef_values = values
-                if len(key_parts) > 1:
-                    ef_values = filter(lambda x: x.split(':')[0] != key_parts[1], values)
-                if len(ef_values):
-                    r.srem(dk, *ef_values)
+        generation = str(r.incr(GENERATION_KEY))
     except RedisError as e:
         raise FountainError(e.message)
+    finally:
+        cache.clear()
 
 
-def __get_vocab_set(pattern, vid=None):
+def __copy(value):
+    """
+    Shallow-copy a cached description (or list of terms) so that callers cannot modify the cached one
+    :param value:
+    :return:
     """
+    if isinstance(value, dict):
+        return dict([(k, list(v) if isinstance(v, list) else v) for k, v in value.items()])
+    return list(value)
+
 
-    :param pattern:
+def __key_term(address):
+    """
+    Split a facet address (vocabs:<vid>:<kind>:<term>:<facet>) into its kind and term
+    :param address:
+    :return:
+    """
+    parts = address.split(':')
+    return parts[2], ':'.join(parts[3:-1])
+
+
+def __address(vid, kind, term, facet):
+    """
+    Return the address of a term facet in a vocabulary. It is the key of the facet in the 'sets' layout.
+    :param vid:
+    :param kind: Either 'types' or 'properties'
+    :param term:
+    :param facet:
+    :return:
+    """
+    return 'vocabs:{}:{}:{}:{}'.format(vid, kind, term, facet)
+
+
+def __records_key(vid, kind):
+    """
+    Return the key of the hash that holds all the term records of a kind in a vocabulary ('compact' layout)
     :param vid:
+    :param kind:
     :return:
     """
+    return 'vocabs:{}:{}:records'.format(vid, kind)
+
+
+def __read_facets(kind, vid_terms, facets, _layout=None):
+    """
+    Read some facets of several terms as recorded by each vocabulary, in a single round trip
+    :param kind: Either 'types' or 'properties'
+    :param vid_terms: An iterable of (vocabulary id, term) pairs
+    :param facets:
+    :param _layout: The storage layout to read from (the current one by default)
+    :return: A dictionary of (vocabulary id, term) -> (facet -> set of members, or the value of '_type')
+    """
+    _layout = _layout or __get_layout()
+    vid_terms = list(vid_terms)
     try:
-        if vid is not None:
-            pattern = pattern.replace(':*:', ':%s:' % vid)
-        all_sets = map(lambda x: r.smembers(x), r.keys(pattern))
-        return list(reduce(set.union, all_sets, set([])))
+        with r.pipeline(transaction=False) as pipe:
+            for vid, term in vid_terms:
+                if _layout == 'compact':
+                    pipe.hget(__records_key(vid, kind), term)
+                    continue
+                for facet in facets:
+                    if facet == '_type':
+                        pipe.get(__address(vid, kind, term, facet))
+                    else:
+                        pipe.smembers(__address(vid, kind, term, facet))
+            results = pipe.execute()
     except RedisError as e:
         raise FountainError(e.message)
 
+    read = {}
+    if _layout == 'compact':
+        for vid_term, record in zip(vid_terms, results):
+            record = json.loads(record) if record is not None else {}
+            read[vid_term] = dict([(f, record.get(f) if f == '_type' else set(__encode_terms(record.get(f, []))))
+                                   for f in facets])
+    else:
+        for i, vid_term in enumerate(vid_terms):
+            read[vid_term] = dict(zip(facets, results[i * len(facets):(i + 1) * len(facets)]))
+    return read
+
 
-def __extract_type(t, vid):
+def __encode_terms(terms):
     """
+    Keep terms decoded from JSON as byte strings, like the rest of the index
+    :param terms:
+    :return:
+    """
+    return [t.encode('utf-8') for t in terms]
 
-    :param t:
+
+def __read_sets(keys):
+    """
+    Read the members of several sets in a single round trip
+    :param keys:
+    :return: The list of member sets, in the same order as the keys
+    """
+    try:
+        with r.pipeline(transaction=False) as pipe:
+            for k in keys:
+                pipe.smembers(k)
+            return pipe.execute()
+    except RedisError as e:
+        raise FountainError(e.message)
+
+
+def __vocab_keys(vid, types, props, _layout=None):
+    """
+    Return every key that a vocabulary may own in the index
+    :param vid:
+    :param types:
+    :param props:
+    :param _layout: The storage layout (the current one by default)
+    :return:
+    """
+    keys = ['vocabs:{}:types'.format(vid), 'vocabs:{}:properties'.format(vid)]
+    if (_layout or __get_layout()) == 'compact':
+        keys.extend([__records_key(vid, 'types'), __records_key(vid, 'properties')])
+    else:
+        keys.extend([__address(vid, 'types', t, f) for t in types for f in TYPE_FACETS])
+        keys.extend(['vocabs:{}:properties:{}'.format(vid, p) for p in props])
+        keys.extend([__address(vid, 'properties', p, f) for p in props for f in PROPERTY_FACETS])
+    return keys
+
+
+def __tracked_members(vid, types, props):
+    """
+    Return the facet members of the given terms of a vocabulary that are tracked in the reverse-dependency
+    index, as a list of (facet address, members) pairs
+    :param vid:
+    :param types:
+    :param props:
+    :return:
+    """
+    tracked = []
+    for kind, terms in [('types', types), ('properties', props)]:
+        facets = TRACKED_FACETS[kind]
+        for (_, term), t_facets in __read_facets(kind, [(vid, t) for t in terms], facets).items():
+            tracked.extend([(__address(vid, kind, term, f), t_facets[f]) for f in facets])
+    return tracked
+
+
+def __get_vocab_set(kind, vid=None):
+    """
+    Compute the terms of a kind with server-side set algebra: all of them (SUNION of every vocabulary set) or
+    only those exclusive to a vocabulary (SDIFF of its set and those of the rest)
+    :param kind: Either 'types' or 'properties'
     :param vid:
     :return:
     """
-    log.debug('Extracting type {} from the {} vocabulary...'.format(t, vid))
     try:
-        with r.pipeline() as pipe:
-            pipe.multi()
-            pipe.sadd('vocabs:{}:types'.format(vid), t)
-            for s in sch.get_supertypes(t):
-                pipe.sadd('vocabs:{}:types:{}:super'.format(vid, t), s)
-            for s in sch.get_subtypes(t):
-                pipe.sadd('vocabs:{}:types:{}:sub'.format(vid, t), s)
-            for s in sch.get_type_properties(t):
-                pipe.sadd('vocabs:{}:types:{}:props'.format(vid, t), s)
-            for s in sch.get_type_references(t):
-                pipe.sadd('vocabs:{}:types:{}:refs'.format(vid, t), s)
-            pipe.execute()
+        other_keys = ['vocabs:{}:{}'.format(v, kind) for v in r.smembers(VOCABS_KEY) if v != vid]
+        if vid is not None:
+            return list(r.sdiff('vocabs:{}:{}'.format(vid, kind), *other_keys))
+        if not len(other_keys):
+            return []
+        return list(r.sunion(other_keys))
     except RedisError as e:
         raise FountainError(e.message)
 
 
-def __extract_property(p, vid):
+def __describe_type(t):
     """
+    Compute the facets of a type from the schema
+    :param t:
+    :return:
+    """
+    log.debug('Describing type {}...'.format(t))
+    return {'super': sch.get_supertypes(t),
+            'sub': sch.get_subtypes(t),
+            'props': sch.get_type_properties(t),
+            'refs': sch.get_type_references(t)}
+
 
+def __describe_property(p):
+    """
+    Compute the facets of a property from the schema
     :param p:
-    :param vid:
     :return:
     """
+    log.debug('Describing property {}...'.format(p))
+    return {'_domain': sch.get_property_domain(p),
+            '_range': sch.get_property_range(p),
+            '_inverse': sch.get_property_inverses(p),
+            '_type': 'object' if sch.is_object_property(p) else 'data'}
+
 
-    def p_type():
-        if sch.is_object_property(p):
-            return 'object'
+def __write_term(pipe, kind, vid, term, facets, _layout=None):
+    """
+    Add the write commands of a term record of a vocabulary to a pipeline
+    :param pipe:
+    :param kind: Either 'types' or 'properties'
+    :param vid:
+    :param term:
+    :param facets: A dictionary of facet -> members (or the value of '_type')
+    :param _layout: The storage layout to write in (the current one by default)
+    :return:
+    """
+    pipe.sadd(VOCABS_KEY, vid)
+    pipe.sadd('vocabs:{}:{}'.format(vid, kind), term)
+    pipe.sadd('{}:{}:vocabs'.format(kind, term), vid)
+    for facet in TRACKED_FACETS[kind]:
+        for s in facets[facet]:
+            pipe.sadd('mentions:{}'.format(s), __address(vid, kind, term, facet))
+
+    if (_layout or __get_layout()) == 'compact':
+        record = dict([(f, v if f == '_type' else list(v)) for f, v in facets.items()])
+        pipe.hset(__records_key(vid, kind), term, json.dumps(record))
+        return
+
+    if kind == 'properties':
+        pipe.hset('vocabs:{}:properties:{}'.format(vid, term), 'uri', term)
+    for facet, members in facets.items():
+        if facet == '_type':
+            pipe.set(__address(vid, kind, term, facet), members)
         else:
-            return 'data'
+            for s in members:
+                pipe.sadd(__address(vid, kind, term, facet), s)
 
+
+def __write_terms(records, progress=None):
+    """
+    Write the computed term records in chunks, each of them as a single MULTI/EXEC round trip
+    :param records: A list of (kind, vid, term, facets) tuples
+    :param progress: An optional function of (written, total) to be called after each chunk
+    :return:
+    """
+    chunk_size = max(app.config.get('EXTRACT_CHUNK_SIZE', 256), 1)
+    total = len(records)
     try:
-        log.debug('Extracting property {} from the {} vocabulary...'.format(p, vid))
-        with r.pipeline() as pipe:
-            pipe.multi()
-            pipe.sadd('vocabs:{}:properties'.format(vid), p)
-            pipe.hset('vocabs:{}:properties:{}'.format(vid, p), 'uri', p)
-            for dc in list(sch.get_property_domain(p)):
-                pipe.sadd('vocabs:{}:properties:{}:_domain'.format(vid, p), dc)
-            for dc in list(sch.get_property_range(p)):
-                pipe.sadd('vocabs:{}:properties:{}:_range'.format(vid, p), dc)
-            for dc in list(sch.get_property_inverses(p)):
-                pipe.sadd('vocabs:{}:properties:{}:_inverse'.format(vid, p), dc)
-            pipe.set('vocabs:{}:properties:{}:_type'.format(vid, p), p_type())
-            pipe.execute()
+        for start in xrange(0, total, chunk_size):
+            with r.pipeline() as pipe:
+                pipe.multi()
+                for kind, vid, term, facets in records[start:start + chunk_size]:
+                    __write_term(pipe, kind, vid, term, facets)
+                pipe.execute()
+            written = min(start + chunk_size, total)
+            log.debug('Written {}/{} term records'.format(written, total))
+            if progress is not None:
+                progress(written, total)
     except RedisError as e:
         raise FountainError(e.message)
 
@@ -187,28 +409,24 @@ def __extract_types(vid):
     types = sch.get_types(vid)
 
     other_vocabs = filter(lambda x: x != vid, vocs.get_vocabularies())
+    o_types = dict([(ovid, [t for t in get_types(ovid) if t not in types]) for ovid in other_vocabs])
+    o_props = dict([(ovid, get_properties(ovid)) for ovid in other_vocabs])
+    t_dicts = get_types_bulk(set.union(set([]), *map(set, o_types.values())))
+    p_dicts = get_properties_bulk(set.union(set([]), *map(set, o_props.values())))
     dependent_types = set([])
     dependent_props = set([])
     for ovid in other_vocabs:
-        o_types = [t for t in get_types(ovid) if t not in types]
-        for oty in o_types:
-            otype = get_type(oty)
+        for oty in filter(lambda x: x in t_dicts, o_types[ovid]):
+            otype = t_dicts[oty]
             if set.intersection(types, otype.get('super')) or set.intersection(types, otype.get('sub')):
                 dependent_types.add((ovid, oty))
-        o_props = [t for t in get_properties(ovid)]
-        for op in o_props:
-            oprop = get_property(op)
+        for op in filter(lambda x: x in p_dicts, o_props[ovid]):
+            oprop = p_dicts[op]
             if set.intersection(types, oprop.get('domain')) or set.intersection(types, oprop.get('range')):
                 dependent_props.add((ovid, op))
 
     types = set.union(set([(vid, t) for t in types]), dependent_types)
-    futures = []
-    # TODO: Catch exceptions from threadpool
-    for v, t in types:
-        futures.append(tpool.submit(__extract_type, t, v))
-    for v, p in dependent_props:
-        futures.append(tpool.submit(__extract_property, p, v))
-    return types, futures
+    return types, dependent_props
 
 
 def __extract_properties(vid):
@@ -220,56 +438,186 @@ def __extract_properties(vid):
     properties = sch.get_properties(vid)
 
     other_vocabs = filter(lambda x: x != vid, vocs.get_vocabularies())
+    o_types = dict([(ovid, get_types(ovid)) for ovid in other_vocabs])
+    t_dicts = get_types_bulk(set.union(set([]), *map(set, o_types.values())))
     dependent_types = set([])
     for ovid in other_vocabs:
-        o_types = [t for t in get_types(ovid)]
-        for oty in o_types:
-            o_type = get_type(oty)
+        for oty in filter(lambda x: x in t_dicts, o_types[ovid]):
+            o_type = t_dicts[oty]
             if set.intersection(properties, o_type.get('refs')) or set.intersection(properties,
                                                                                     o_type.get('properties')):
                 dependent_types.add((ovid, oty))
 
-    futures = []
-    for p in properties:
-        futures.append(tpool.submit(__extract_property, p, vid))
-    for v, ty in dependent_types:
-        futures.append(tpool.submit(__extract_type, ty, v))
-    return properties, futures
+    return properties, dependent_types
 
 
-def delete_vocabulary(vid):
+def __materialize(types, props):
     """
+    Merge the per-vocabulary sets of the given terms into a single record per term, so that reads are
+    a single fetch. Properties also take the domain and range derived from their inverses.
+    :param types:
+    :param props:
+    :return:
+    """
+    types, props = set(types), set(props)
+    t_sets = __get_terms_sets('types', __get_terms_vocabs('types', types), 'super', 'sub', 'props', 'refs')
+
+    p_vids = __get_terms_vocabs('properties', props)
+    p_sets = __get_terms_sets('properties', p_vids, '_domain', '_range', '_inverse')
+    inverses = set.union(set([]), *[sets['_inverse'] for sets in p_sets.values()])
+    i_sets = {}
+    if len(inverses):
+        i_sets = __get_terms_sets('properties', __get_terms_vocabs('properties', inverses), '_domain', '_range')
+
+    p_types = __read_facets('properties', [(vid, p) for p, vids in p_vids.items() for vid in vids], ['_type'])
+    p_types = dict([(prop, facets['_type']) for (_, prop), facets in p_types.items() if facets['_type'] is not None])
+    try:
+        with r.pipeline() as pipe:
+            pipe.multi()
+            for ty in types:
+                pipe.delete('types:{}'.format(ty))
+                if ty in t_sets:
+                    sets = t_sets[ty]
+                    pipe.hmset('types:{}'.format(ty), {'super': json.dumps(list(sets['super'])),
+                                                       'sub': json.dumps(list(sets['sub'])),
+                                                       'properties': json.dumps(list(sets['props'])),
+                                                       'refs': json.dumps(list(sets['refs']))})
+            for prop in props:
+                pipe.delete('properties:{}'.format(prop))
+                if prop in p_sets:
+                    domain, rang, inv = p_sets[prop]['_domain'], p_sets[prop]['_range'], p_sets[prop]['_inverse']
+                    for i in filter(lambda x: x in i_sets, inv):
+                        domain.update(i_sets[i]['_range'])
+                        rang.update(i_sets[i]['_domain'])
+                    pipe.hmset('properties:{}'.format(prop), {'domain': json.dumps(list(domain)),
+                                                              'range': json.dumps(list(rang)),
+                                                              'inverse': json.dumps(list(inv)),
+                                                              'type': p_types.get(prop, 'object')})
+            pipe.execute()
+    except RedisError as e:
+        raise FountainError(e.message)
+
+
+def __get_inverses(props):
+    """
+    Collect the inverses declared for the given properties in any vocabulary
+    :param props:
+    :return:
+    """
+    p_sets = __get_terms_sets('properties', __get_terms_vocabs('properties', props), '_inverse')
+    return set.union(set([]), *[sets['_inverse'] for sets in p_sets.values()])
+
+
+def __get_inverse_declarers(props):
+    """
+    Find the properties that declare any of the given ones as their inverse, in any vocabulary
+    :param props:
+    :return:
+    """
+    addresses = set.union(set([]), *map(set, __read_sets(['mentions:{}'.format(p) for p in props])))
+    return set([term for kind, term in map(__key_term, filter(lambda k: k.endswith(':_inverse'), addresses))
+                if kind == 'properties'])
 
+
+def delete_vocabulary(vid):
+    """
+    Remove a vocabulary from the index. Only the keys that it owns and those of other vocabularies that
+    mention its exclusive terms (as found in the reverse-dependency index) are modified, all at once.
     :param vid:
     :return:
     """
-    v_types = get_types(vid)
-    if len(v_types):
-        __remove_from_sets(v_types, '*:_domain', '*:_range', '*:sub', '*:super')
-    v_props = get_properties(vid)
-    if len(v_props):
-        __remove_from_sets(v_props, '*:refs', '*:props')
     try:
-        v_keys = r.keys('vocabs:{}:*'.format(vid))
-        if len(v_keys):
-            r.delete(*v_keys)
+        all_v_types = r.smembers('vocabs:{}:types'.format(vid))
+        all_v_props = r.smembers('vocabs:{}:properties'.format(vid))
+    except RedisError as e:
+        raise FountainError(e.message)
+    # Properties of other vocabularies may derive their domain and range from the ones to be removed
+    v_inverses = __get_inverses(all_v_props).union(__get_inverse_declarers(all_v_props))
+
+    v_terms = [(t, SWEPT_FACETS['types']) for t in get_types(vid)]
+    v_terms.extend([(p, SWEPT_FACETS['properties']) for p in get_properties(vid)])
+    own_keys = __vocab_keys(vid, all_v_types, all_v_props)
+    tracked = __tracked_members(vid, all_v_types, all_v_props)
+    mentions = __read_sets(['mentions:{}'.format(x) for x, _ in v_terms])
+
+    swept = []
+    for (x, facets), addresses in zip(v_terms, mentions):
+        for k in filter(lambda k: not k.startswith('vocabs:{}:'.format(vid)), addresses):
+            # Terms prefixed as the vocabulary of a key are kept in it
+            if k.split(':')[-1] in facets and x.split(':')[0] != k.split(':')[1]:
+                swept.append((k, x))
+
+    swept_records = {}
+    if __get_layout() == 'compact':
+        # Records of other vocabularies that mention the swept terms have to be rewritten
+        owners = {}
+        for k, x in swept:
+            kind, term = __key_term(k)
+            owners.setdefault((kind, k.split(':')[1], term), {}).setdefault(k.split(':')[-1], set([])).add(x)
+        for (kind, ovid, term), removed in owners.items():
+            facets = PROPERTY_FACETS if kind == 'properties' else TYPE_FACETS
+            record = __read_facets(kind, [(ovid, term)], facets)[(ovid, term)]
+            for facet, members in removed.items():
+                record[facet].difference_update(members)
+            swept_records[(kind, ovid, term)] = record
+
+    try:
+        with r.pipeline() as pipe:
+            pipe.multi()
+            for k, x in swept:
+                if __get_layout() != 'compact':
+                    pipe.srem(k, x)
+                pipe.srem('mentions:{}'.format(x), k)
+            for (kind, ovid, term), record in swept_records.items():
+                record = dict([(f, v if f == '_type' else list(v)) for f, v in record.items()])
+                pipe.hset(__records_key(ovid, kind), term, json.dumps(record))
+            for k, members in tracked:
+                for m in members:
+                    pipe.srem('mentions:{}'.format(m), k)
+            # Unregister the vocabulary from the reverse index of every term it declared
+            for t in all_v_types:
+                pipe.srem('types:{}:vocabs'.format(t), vid)
+            for p in all_v_props:
+                pipe.srem('properties:{}:vocabs'.format(p), vid)
+            pipe.delete(*own_keys)
+            pipe.srem(VOCABS_KEY, vid)
+            pipe.execute()
     except RedisError as e:
         raise FountainError(e.message)
 
+    modified = [__key_term(k) for k, _ in swept]
+    __materialize(all_v_types.union([term for kind, term in modified if kind == 'types']),
+                  all_v_props.union([term for kind, term in modified if kind == 'properties'], v_inverses))
+    __bump_generation()
 
-def extract_vocabulary(vid):
-    """
 
+def extract_vocabulary(vid, progress=None):
+    """
+    Extract the terms of a vocabulary (and those of other vocabularies that depend on them) into the index.
+    All term records are first computed from the schema and then written in chunks.
     :param vid:
+    :param progress: An optional function of (written, total) term records
     :return:
     """
     log.info('Extracting vocabulary {}...'.format(vid))
     delete_vocabulary(vid)
     start_time = dt.now()
-    types, t_futures = __extract_types(vid)
-    properties, p_futures = __extract_properties(vid)
-    for f in t_futures + p_futures:
-        f.result()
+    # The ontology graph must not change while it is analysed
+    with sch.graph_lock:
+        types, dependent_props = __extract_types(vid)
+        properties, dependent_types = __extract_properties(vid)
+
+        type_terms = set.union(types, dependent_types)
+        prop_terms = set.union(set([(vid, p) for p in properties]), dependent_props)
+        records = [('types', v, t, __describe_type(t)) for v, t in type_terms]
+        records.extend([('properties', v, p, __describe_property(p)) for v, p in prop_terms])
+    log.info('Computed {} term records (in {}ms)'.format(len(records),
+                                                         (dt.now() - start_time).total_seconds() * 1000))
+    __write_terms(records, progress)
+
+    props = set([p for _, p in prop_terms])
+    __materialize([t for _, t in type_terms], props.union(__get_inverses(props), __get_inverse_declarers(props)))
+    __bump_generation()
     log.info('Done (in {}ms)'.format((dt.now() - start_time).total_seconds() * 1000))
     return types, properties
 
@@ -280,17 +628,14 @@ def get_types(vid=None):
     :param vid:
     :return:
     """
+    key = ('types', vid, generation)
+    cached = cache.get(key)
+    if cached is not None:
+        return __copy(cached)
 
-    def shared_type(t):
-        return any(filter(lambda k: r.sismember(k, t), all_type_keys))
-
-    vid_types = __get_vocab_set('vocabs:*:types', vid)
-
-    if vid is not None:
-        all_type_keys = filter(lambda k: k != 'vocabs:{}:types'.format(vid), r.keys("vocabs:*:types"))
-        vid_types = filter(lambda t: not shared_type(t), vid_types)
-
-    return vid_types
+    vid_types = __get_vocab_set('types', vid)
+    cache.set(key, vid_types)
+    return __copy(vid_types)
 
 
 def get_properties(vid=None):
@@ -299,53 +644,117 @@ def get_properties(vid=None):
     :param vid:
     :return:
     """
+    key = ('properties', vid, generation)
+    cached = cache.get(key)
+    if cached is not None:
+        return __copy(cached)
 
-    def shared_property(t):
-        return any(filter(lambda k: r.sismember(k, t), all_prop_keys))
+    vid_props = __get_vocab_set('properties', vid)
+    cache.set(key, vid_props)
+    return __copy(vid_props)
 
-    vid_props = __get_vocab_set('vocabs:*:properties', vid)
 
-    if vid is not None:
-        all_prop_keys = filter(lambda k: k != 'vocabs:{}:properties'.format(vid), r.keys("vocabs:*:properties"))
-        vid_props = filter(lambda t: not shared_property(t), vid_props)
+def __get_terms_vocabs(kind, terms):
+    """
+    Return the vocabularies that declare each of the given terms, as recorded in the reverse index
+    :param kind: Either 'types' or 'properties'
+    :param terms:
+    :return: A dictionary of term -> set of vocabulary ids (unknown terms are left out)
+    """
+    terms = list(terms)
+    try:
+        with r.pipeline(transaction=False) as pipe:
+            for term in terms:
+                pipe.smembers('{}:{}:vocabs'.format(kind, term))
+            results = pipe.execute()
+    except RedisError as e:
+        raise FountainError(e.message)
+    return dict([(term, vids) for term, vids in zip(terms, results) if vids])
+
 
-    return vid_props
+def __get_terms_sets(kind, terms_vids, *facets):
+    """
+    Fetch and merge the facet sets of several terms from all their vocabularies in a single round trip
+    :param kind: Either 'types' or 'properties'
+    :param terms_vids: A dictionary of term -> set of vocabulary ids
+    :param facets:
+    :return: A dictionary of term -> (facet -> merged set)
+    """
+    read = __read_facets(kind, [(vid, term) for term, vids in terms_vids.items() for vid in vids], facets)
+    merged = dict([(term, dict([(facet, set([])) for facet in facets])) for term in terms_vids])
+    for (_, term), t_facets in read.items():
+        for facet in facets:
+            merged[term][facet].update(t_facets[facet])
+    return merged
 
 
-def get_property(prop):
+def __get_cached(kind, terms, gen):
     """
+    Collect the cached descriptions of the given terms
+    :param kind: Either 'type' or 'property'
+    :param terms:
+    :param gen: The generation the descriptions were cached for
+    :return: A dictionary of term -> cached description (terms that are not cached are left out)
+    """
+    cached = [(term, cache.get((kind, term, gen))) for term in terms]
+    return dict([(term, d) for term, d in cached if d is not None])
 
-    :param prop:
+
+def __load_terms(value):
+    """
+    Decode a JSON-encoded list of terms of a record
+    :param value:
     :return:
     """
+    return __encode_terms(json.loads(value))
 
-    def get_inverse_domain(ip):
-        return reduce(set.union, __get_by_pattern('*:properties:{}:_domain'.format(ip), r.smembers), set([]))
 
-    def get_inverse_range(ip):
-        return reduce(set.union, __get_by_pattern('*:properties:{}:_range'.format(ip), r.smembers), set([]))
+def __get_records(kind, terms):
+    """
+    Fetch the merged records of several terms in a single round trip
+    :param kind: Either 'types' or 'properties'
+    :param terms:
+    :return: A dictionary of term -> record (unknown terms are left out)
+    """
+    terms = list(terms)
+    try:
+        with r.pipeline(transaction=False) as pipe:
+            for term in terms:
+                pipe.hgetall('{}:{}'.format(kind, term))
+            results = pipe.execute()
+    except RedisError as e:
+        raise FountainError(e.message)
+    return dict([(term, record) for term, record in zip(terms, results) if record])
 
-    all_prop_keys = r.keys('*:properties')
-    if not filter(lambda k: r.sismember(k, prop), all_prop_keys):
-        raise TypeError('Unknown property')
 
-    domain = reduce(set.union, __get_by_pattern('*:properties:{}:_domain'.format(prop), r.smembers), set([]))
-    rang = reduce(set.union, __get_by_pattern('*:properties:{}:_range'.format(prop), r.smembers), set([]))
-    inv = reduce(set.union, __get_by_pattern('*:properties:{}:_inverse'.format(prop), r.smembers), set([]))
+def get_properties_bulk(props):
+    """
+    Describe several properties at once, with a single round trip to Redis
+    :param props: An iterable of prefixed properties
+    :return: A dictionary of property -> description (unknown properties are left out)
+    """
+    gen = generation
+    descriptions = __get_cached('property', props, gen)
+    records = __get_records('properties', [p for p in set(props) if p not in descriptions])
+    for prop, record in records.items():
+        descriptions[prop] = {'domain': __load_terms(record['domain']),
+                              'range': __load_terms(record['range']),
+                              'inverse': __load_terms(record['inverse']),
+                              'type': record['type']}
+        cache.set(('property', prop, gen), descriptions[prop])
+    return dict([(prop, __copy(d)) for prop, d in descriptions.items()])
 
-    if len(inv):
-        inverse_dr = [(get_inverse_domain(i), get_inverse_range(i)) for i in inv]
-        for dom, ra in inverse_dr:
-            domain.update(ra)
-            rang.update(dom)
 
-    ty = __get_by_pattern('*:properties:{}:_type'.format(prop), r.get)
-    try:
-        ty = ty.pop()
-    except IndexError:
-        ty = 'object'
+def get_property(prop):
+    """
 
-    return {'domain': list(domain), 'range': list(rang), 'inverse': list(inv), 'type': ty}
+    :param prop:
+    :return:
+    """
+    try:
+        return get_properties_bulk([prop])[prop]
+    except KeyError:
+        raise TypeError('Unknown property')
 
 
 def is_property(prop):
@@ -355,7 +764,7 @@ def is_property(prop):
     :return:
     """
     try:
-        return len(r.keys('*:properties:{}:*'.format(prop)))
+        return r.exists('properties:{}:vocabs'.format(prop))
     except RedisError as e:
         raise FountainError(e.message)
 
@@ -367,11 +776,26 @@ def is_type(ty):
     :return:
     """
     try:
-        return len(r.keys('*:types:{}:*'.format(ty)))
+        return r.exists('types:{}:vocabs'.format(ty))
     except RedisError as e:
         raise FountainError(e.message)
 
 
+def get_types_bulk(types):
+    """
+    Describe several types at once, with a single round trip to Redis
+    :param types: An iterable of prefixed types
+    :return: A dictionary of type -> description (unknown types are left out)
+    """
+    gen = generation
+    descriptions = __get_cached('type', types, gen)
+    records = __get_records('types', [t for t in set(types) if t not in descriptions])
+    for ty, record in records.items():
+        descriptions[ty] = dict([(f, __load_terms(record[f])) for f in ['super', 'sub', 'properties', 'refs']])
+        cache.set(('type', ty, gen), descriptions[ty])
+    return dict([(ty, __copy(d)) for ty, d in descriptions.items()])
+
+
 def get_type(ty):
     """
 
@@ -379,18 +803,130 @@ def get_type(ty):
     :return:
     """
     try:
-        all_type_keys = r.keys('*:types')
-        if not filter(lambda k: r.sismember(k, ty), all_type_keys):
-            raise TypeError('Unknown type: {}'.format(ty))
-
-        super_types = reduce(set.union, __get_by_pattern('*:types:{}:super'.format(ty), r.smembers), set([]))
-        sub_types = reduce(set.union, __get_by_pattern('*:types:{}:sub'.format(ty), r.smembers), set([]))
-        type_props = reduce(set.union, __get_by_pattern('*:types:{}:props'.format(ty), r.smembers), set([]))
-        type_refs = reduce(set.union, __get_by_pattern('*:types:{}:refs'.format(ty), r.smembers), set([]))
-
-        return {'super': list(super_types),
-                'sub': list(sub_types),
-                'properties': list(type_props),
-                'refs': list(type_refs)}
+        return get_types_bulk([ty])[ty]
+    except KeyError:
+        raise TypeError('Unknown type: {}'.format(ty))
+
+
+def __upgrade_index():
+    """
+    Bring an index written by a previous version up to date: register every vocabulary, term and facet
+    member in the reverse indexes and materialize the merged records of all the terms
+    :return:
+    """
+    try:
+        version = int(r.get(VERSION_KEY) or 0)
+        if version >= INDEX_VERSION:
+            return
+
+        log.info('Upgrading the index from version {} to {}...'.format(version, INDEX_VERSION))
+        types, props = set([]), set([])
+        for vid in vocs.get_vocabularies():
+            v_types = r.smembers('vocabs:{}:types'.format(vid))
+            v_props = r.smembers('vocabs:{}:properties'.format(vid))
+            tracked = __tracked_members(vid, v_types, v_props)
+            with r.pipeline() as pipe:
+                pipe.multi()
+                for t in v_types:
+                    pipe.sadd('types:{}:vocabs'.format(t), vid)
+                for p in v_props:
+                    pipe.sadd('properties:{}:vocabs'.format(p), vid)
+                if len(v_types) or len(v_props):
+                    pipe.sadd(VOCABS_KEY, vid)
+                for k, members in tracked:
+                    for m in members:
+                        pipe.sadd('mentions:{}'.format(m), k)
+                pipe.execute()
+            types.update(v_types)
+            props.update(v_props)
+    except RedisError as e:
+        raise FountainError(e.message)
+
+    __materialize(types, props)
+    r.set(VERSION_KEY, INDEX_VERSION)
+    __bump_generation()
+
+
+def migrate_layout(target):
+    """
+    Rewrite the per-vocabulary term facets of the whole index in another storage layout. The layout of the
+    index only changes once every vocabulary has been rewritten; an interrupted migration resumes where it stopped
+    :param target: Either 'sets' or 'compact'
+    :return: The number of term records that were migrated
+    """
+    global layout
+    if target not in LAYOUTS:
+        raise FountainError('Unknown index layout: {}'.format(target))
+    try:
+        source = __stored_layout()
+        pending = r.get(MIGRATION_KEY)
+        if pending is not None and pending != target:
+            raise FountainError('A migration to the {} layout has not finished yet'.format(pending))
+        if source == target:
+            return 0
+
+        r.set(MIGRATION_KEY, target)
+        done = r.smembers(MIGRATED_KEY)
+        if done:
+            log.info('Resuming the migration to the {} layout ({} vocabularies done)...'.format(target, len(done)))
+        else:
+            log.info('Migrating the index from the {} layout to the {} one...'.format(source, target))
+        migrated = 0
+        for vid in r.smembers(VOCABS_KEY).difference(done):
+            v_types = r.smembers('vocabs:{}:types'.format(vid))
+            v_props = r.smembers('vocabs:{}:properties'.format(vid))
+            t_facets = __read_facets('types', [(vid, t) for t in v_types], TYPE_FACETS, _layout=source)
+            p_facets = __read_facets('properties', [(vid, p) for p in v_props], PROPERTY_FACETS, _layout=source)
+            with r.pipeline() as pipe:
+                pipe.multi()
+                pipe.delete(*__vocab_keys(vid, v_types, v_props, _layout=source))
+                for (_, t), facets in t_facets.items():
+                    __write_term(pipe, 'types', vid, t, facets, _layout=target)
+                for (_, p), facets in p_facets.items():
+                    facets['_type'] = facets['_type'] or 'object'
+                    __write_term(pipe, 'properties', vid, p, facets, _layout=target)
+                pipe.sadd(MIGRATED_KEY, vid)
+                pipe.execute()
+            migrated += len(t_facets) + len(p_facets)
+
+        with r.pipeline() as pipe:
+            pipe.multi()
+            pipe.set(LAYOUT_KEY, target)
+            pipe.delete(MIGRATION_KEY, MIGRATED_KEY)
+            pipe.execute()
     except RedisError as e:
         raise FountainError(e.message)
+
+    layout = target
+    __bump_generation()
+    log.info('{} term records migrated'.format(migrated))
+    return migrated
+
+
+def __setup():
+    """
+    Prepare the index once the store is reachable: read its layout and generation, and upgrade it if needed
+    :return:
+    """
+    global layout, generation
+    if 'memory' in app.config['STORE']:
+        r.flushdb()
+    layout = __stored_layout()
+    generation = r.get(GENERATION_KEY)
+    __upgrade_index()
+
+
+def is_ready():
+    """
+    Check whether the index store is reachable (setting the index up on first use)
+    :return:
+    """
+    try:
+        return bool(r.ping())
+    except (RedisError, FountainError) as e:
+        log.warning('The index is not ready: {}'.format(e.message))
+        return False
+
+
+# The store is connected to, and the index set up, on first use
+r = LazyObject(__connect, setup=__setup)
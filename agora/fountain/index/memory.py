@@ -0,0 +1,354 @@
+"""
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  This file is part of the Smart Developer Hub Project:
+    http://www.smartdeveloperhub.org
+
+  Center for Open Middleware
+        http://www.centeropenmiddleware.com/
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Copyright (C) 2015 Center for Open Middleware.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this file except in compliance with the License.
+  You may obtain a copy of the License at 
+
+            http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+"""
+
+import fnmatch
+from threading import Lock, RLock
+
+from redis.exceptions import ResponseError
+
+__author__ = 'Fernando Serena'
+
+WRONG_TYPE = 'WRONGTYPE Operation against a key holding the wrong kind of value'
+
+
+def _encode(value):
+    """
+    Store every value as a byte string, as Redis does
+    :param value:
+    :return:
+    """
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+class SortedSet(dict):
+    """
+    Member -> score mapping, kept apart from hashes so that type checks behave as in Redis
+    """
+
+
+class MemoryStore(object):
+    """
+    An embedded, thread-safe index store that implements the subset of the StrictRedis interface used by the
+    fountain with plain dictionaries and sets. Keys are additionally indexed by their first segment, so that
+    prefix scans (e.g. 'paths:*') do not walk the whole keyspace.
+    """
+
+    def __init__(self):
+        self.__data = {}
+        self.__prefixes = {}
+        self.__locks = {}
+        self.__lock = RLock()
+
+    # Keyspace
+
+    def __read(self, key, kind):
+        value = self.__data.get(_encode(key))
+        if value is not None and type(value) is not kind:
+            raise ResponseError(WRONG_TYPE)
+        return value
+
+    def __write(self, key, kind):
+        key = _encode(key)
+        value = self.__read(key, kind)
+        if value is None:
+            value = kind()
+            self.__data[key] = value
+            self.__prefixes.setdefault(key.split(':')[0], set([])).add(key)
+        return value
+
+    def __prune(self, key):
+        # Redis drops containers as soon as they get empty
+        if not self.__data.get(_encode(key), True):
+            self.__remove(key)
+
+    def __remove(self, key):
+        key = _encode(key)
+        if self.__data.pop(key, None) is None:
+            return False
+        prefix = key.split(':')[0]
+        self.__prefixes[prefix].discard(key)
+        if not self.__prefixes[prefix]:
+            del self.__prefixes[prefix]
+        return True
+
+    def ping(self):
+        return True
+
+    def keys(self, pattern='*'):
+        with self.__lock:
+            prefix = pattern.split(':')[0]
+            if ':' in pattern and not any(c in prefix for c in '*?[\\'):
+                candidates = self.__prefixes.get(prefix, set([]))
+            else:
+                candidates = self.__data.keys()
+            return [k for k in candidates if fnmatch.fnmatchcase(k, pattern)]
+
+    def exists(self, key):
+        with self.__lock:
+            return _encode(key) in self.__data
+
+    def delete(self, *keys):
+        with self.__lock:
+            return len(filter(self.__remove, keys))
+
+    def rename(self, src, dst):
+        with self.__lock:
+            src, dst = _encode(src), _encode(dst)
+            if src not in self.__data:
+                raise ResponseError('no such key')
+            value = self.__data[src]
+            self.__remove(src)
+            self.__remove(dst)
+            self.__data[dst] = value
+            self.__prefixes.setdefault(dst.split(':')[0], set([])).add(dst)
+            return True
+
+    def flushdb(self):
+        with self.__lock:
+            self.__data.clear()
+            self.__prefixes.clear()
+            return True
+
+    # Strings
+
+    def get(self, key):
+        with self.__lock:
+            return self.__read(key, str)
+
+    def set(self, key, value):
+        with self.__lock:
+            key = _encode(key)
+            self.__remove(key)
+            self.__data[key] = _encode(value)
+            self.__prefixes.setdefault(key.split(':')[0], set([])).add(key)
+            return True
+
+    def incr(self, key, amount=1):
+        with self.__lock:
+            try:
+                value = int(self.__read(key, str) or 0) + amount
+            except ValueError:
+                raise ResponseError('value is not an integer or out of range')
+            self.set(key, value)
+            return value
+
+    # Sets
+
+    def sadd(self, key, *values):
+        with self.__lock:
+            members = self.__write(key, set)
+            added = set(map(_encode, values)).difference(members)
+            members.update(added)
+            return len(added)
+
+    def srem(self, key, *values):
+        with self.__lock:
+            members = self.__read(key, set) or set([])
+            removed = members.intersection(map(_encode, values))
+            members.difference_update(removed)
+            self.__prune(key)
+            return len(removed)
+
+    def smembers(self, key):
+        with self.__lock:
+            return set(self.__read(key, set) or [])
+
+    def sismember(self, key, value):
+        with self.__lock:
+            return _encode(value) in (self.__read(key, set) or [])
+
+    def sunion(self, keys, *args):
+        with self.__lock:
+            keys = list(keys) + list(args) if isinstance(keys, list) else [keys] + list(args)
+            return set([]).union(*[self.__read(k, set) or [] for k in keys])
+
+    def sdiff(self, keys, *args):
+        with self.__lock:
+            keys = list(keys) + list(args) if isinstance(keys, list) else [keys] + list(args)
+            members = set(self.__read(keys[0], set) or [])
+            return members.difference(*[self.__read(k, set) or [] for k in keys[1:]])
+
+    # Hashes
+
+    def hset(self, key, field, value):
+        with self.__lock:
+            fields = self.__write(key, dict)
+            field = _encode(field)
+            created = field not in fields
+            fields[field] = _encode(value)
+            return int(created)
+
+    def hmset(self, key, mapping):
+        with self.__lock:
+            fields = self.__write(key, dict)
+            fields.update([(_encode(f), _encode(v)) for f, v in mapping.items()])
+            return True
+
+    def hdel(self, key, *fields):
+        with self.__lock:
+            values = self.__read(key, dict) or {}
+            removed = [f for f in map(_encode, fields) if values.pop(f, None) is not None]
+            self.__prune(key)
+            return len(removed)
+
+    def hget(self, key, field):
+        with self.__lock:
+            return (self.__read(key, dict) or {}).get(_encode(field))
+
+    def hmget(self, key, keys, *args):
+        with self.__lock:
+            fields = self.__read(key, dict) or {}
+            keys = list(keys) + list(args) if isinstance(keys, list) else [keys] + list(args)
+            return [fields.get(_encode(f)) for f in keys]
+
+    def hgetall(self, key):
+        with self.__lock:
+            return dict(self.__read(key, dict) or {})
+
+    # Sorted sets
+
+    def zadd(self, key, *args):
+        with self.__lock:
+            scores = self.__write(key, SortedSet)
+            added = 0
+            for score, member in zip(args[::2], args[1::2]):
+                member = _encode(member)
+                added += int(member not in scores)
+                scores[member] = float(score)
+            return added
+
+    def zcard(self, key):
+        with self.__lock:
+            return len(self.__read(key, SortedSet) or {})
+
+    def zrangebyscore(self, key, min, max):
+        with self.__lock:
+            scores = self.__read(key, SortedSet) or {}
+            ranked = sorted(scores.items(), key=lambda (member, score): (score, member))
+            return [m for m, score in ranked if float(min) <= score <= float(max)]
+
+    def zrem(self, key, *values):
+        with self.__lock:
+            scores = self.__read(key, SortedSet) or {}
+            removed = [m for m in map(_encode, values) if scores.pop(m, None) is not None]
+            self.__prune(key)
+            return len(removed)
+
+    def zrange(self, key, start, end, withscores=False):
+        with self.__lock:
+            scores = self.__read(key, SortedSet) or {}
+            ranked = sorted(scores.items(), key=lambda (member, score): (score, member))
+            start = max(len(ranked) + start if start < 0 else start, 0)
+            end = len(ranked) + end if end < 0 else end
+            if end < start:
+                return []
+            ranked = ranked[start:end + 1]
+            if withscores:
+                return ranked
+            return [m for m, _ in ranked]
+
+    # Transactions and locks
+
+    def pipeline(self, transaction=True):
+        return MemoryPipeline(self, self.__lock)
+
+    def lock(self, name, timeout=None):
+        with self.__lock:
+            return self.__locks.setdefault(name, MemoryLock())
+
+
+class MemoryLock(object):
+    """
+    A named lock of the store. Locks only exist in this process, so they are released along with it and need
+    no timeout (nor to be extended)
+    """
+
+    def __init__(self):
+        self.__lock = Lock()
+
+    def acquire(self, blocking=True):
+        return self.__lock.acquire(blocking)
+
+    def release(self):
+        self.__lock.release()
+
+    def extend(self, additional_time):
+        return True
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+class MemoryPipeline(object):
+    """
+    Buffers commands like a Redis pipeline and runs them all at once, atomically, on execute
+    """
+
+    def __init__(self, store, lock):
+        self.__store = store
+        self.__lock = lock
+        self.__commands = []
+
+    def __getattr__(self, name):
+        command = getattr(self.__store, name)
+
+        def buffer(*args, **kwargs):
+            self.__commands.append((command, args, kwargs))
+            return self
+
+        return buffer
+
+    def multi(self):
+        pass
+
+    def reset(self):
+        self.__commands = []
+
+    def execute(self):
+        with self.__lock:
+            results = []
+            for command, args, kwargs in self.__commands:
+                try:
+                    results.append(command(*args, **kwargs))
+                except ResponseError as e:
+                    results.append(e)
+            self.reset()
+        for result in results:
+            if isinstance(result, ResponseError):
+                raise result
+        return results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.reset()
@@ -0,0 +1,52 @@
+"""
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  This file is part of the Smart Developer Hub Project:
+    http://www.smartdeveloperhub.org
+
+  Center for Open Middleware
+        http://www.centeropenmiddleware.com/
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Copyright (C) 2015 Center for Open Middleware.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this file except in compliance with the License.
+  You may obtain a copy of the License at 
+
+            http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+"""
+
+import logging
+import sys
+
+from agora.fountain.index import core, paths
+
+__author__ = 'Fernando Serena'
+
+log = logging.getLogger('agora.fountain.index.migrate')
+
+
+def migrate(target):
+    """
+    Move an existing index to another storage layout
+    :param target: Either 'sets' or 'compact'
+    :return: The number of term records that were migrated
+    """
+    return core.migrate_layout(target)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2 or sys.argv[1] not in core.LAYOUTS + ['paths']:
+        print 'usage: python -m agora.fountain.index.migrate [{}|paths]'.format('|'.join(core.LAYOUTS))
+        sys.exit(1)
+    logging.basicConfig(level=logging.INFO)
+    if sys.argv[1] == 'paths':
+        print '{} paths and cycles converted to the packed encoding'.format(paths.migrate_paths())
+    else:
+        print '{} term records migrated to the {} layout'.format(migrate(sys.argv[1]), sys.argv[1])
@@ -22,35 +22,178 @@
 #-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
 """
 
+import ast
+import hashlib
+import heapq
+import json
 import logging
 import multiprocessing
+import time
 from datetime import datetime as dt
+from itertools import islice
+from uuid import uuid4
 
 import networkx as nx
 from concurrent.futures import wait, ALL_COMPLETED
 from concurrent.futures.thread import ThreadPoolExecutor
+from redis.exceptions import LockError
 
+from agora.fountain.exceptions import FountainError
 from agora.fountain.index import core as index, seeds
+from agora.fountain.index.cache import LRUCache
+from agora.fountain.lazy import LazyObject
+from agora.fountain.server import app
 
 __author__ = 'Fernando Serena'
 
 log = logging.getLogger('agora.fountain.paths')
 
-pgraph = nx.DiGraph()
 match_elm_cycles = {}
+
+# Dictionary of the terms in stored paths and cycles (CURIE <-> small integer), which only grows
+TERM_IDS_KEY = 'terms:ids'
+TERMS_KEY = 'terms:curies'
+# Snapshot of the graph that the stored paths were calculated from
+GRAPH_KEY = 'index:path-graph'
+# Limits the stored paths were enumerated with, and the elements whose paths exceeded them
+LIMITS_KEY = 'index:path-limits'
+TRUNCATED_KEY = 'index:truncated-elements'
+# Subtypes whose stored paths are also paths of a type, by type
+REFS_KEY = 'index:path-refs'
+# Summaries of the strongly connected components of the graph (and their cycles), by signature
+COMPONENTS_KEY = 'index:cycle-components'
+# Renewed (with a unique token) on every calculation of paths; results of find_path are cached for a path and
+# seed generation, in-process and (if enabled) in a hash shared by all nodes
+GENERATION_KEY = 'index:path-generation'
+RESULTS_KEY = 'index:path-results'
+results = LRUCache(app.config.get('PATHS_CACHE_SIZE', 0))
+# Calculations of paths hold a lock (which they keep extending while they run) and stage their new paths under
+# a prefix of their own
+LOCK_KEY = 'index:path-lock'
+STAGING_PREFIX = 'index:staging:'
+# Whether this process already checked for paths stored in the legacy (repr) encoding
+paths_checked = False
 th_pool = ThreadPoolExecutor(multiprocessing.cpu_count())
+# Pool of path worker processes, which is forked by start_workers before any thread starts (a process that is
+# forked while other threads run may inherit locks that are never released), and the state of a worker
+workers = None
+worker_state = None
 
 
 def chunks(l, n):
     """
-    Yield successive n-sized chunks from l.
+    Yield successive n-sized chunks from l (any iterable, which is consumed as chunks are requested).
     :param l:
     :param n:
     :return:
     """
     if n:
-        for i in xrange(0, len(l), n):
-            yield l[i:i + n]
+        it = iter(l)
+        chunk = list(islice(it, n))
+        while chunk:
+            yield chunk
+            chunk = list(islice(it, n))
+
+
+def __intern_terms(terms):
+    """
+    Assign an id to every term that does not have one in the term dictionary yet. Ids are allocated from the
+    size of the dictionary, so callers must hold the lock of the calculations of paths
+    :param terms:
+    :return: A dictionary of term -> id
+    """
+    ids = dict([(t, int(i)) for t, i in index.r.hgetall(TERM_IDS_KEY).items()])
+    new_terms = sorted(set(terms).difference(ids))
+    if new_terms:
+        new_ids = dict(zip(new_terms, xrange(len(ids), len(ids) + len(new_terms))))
+        with index.r.pipeline() as pipe:
+            pipe.multi()
+            pipe.hmset(TERM_IDS_KEY, new_ids)
+            pipe.hmset(TERMS_KEY, dict([(i, t) for t, i in new_ids.items()]))
+            pipe.execute()
+        ids.update(new_ids)
+    return ids
+
+
+def __pack_steps(steps, ids):
+    """
+    Encode a list of steps as the varints of the ids of their property and type, in order
+    :param steps:
+    :param ids: The term dictionary
+    :return:
+    """
+    data = bytearray()
+    for step in steps:
+        for n in (ids[step['property']], ids[step['type']]):
+            while n >= 0x80:
+                data.append((n & 0x7f) | 0x80)
+                n >>= 7
+            data.append(n)
+    return str(data)
+
+
+def __unpack_ids(data):
+    """
+    Decode the varints of a packed list of steps
+    :param data:
+    :return:
+    """
+    ids = []
+    n = shift = 0
+    for b in bytearray(data):
+        n |= (b & 0x7f) << shift
+        shift += 7
+        if not b & 0x80:
+            ids.append(n)
+            n = shift = 0
+    return ids
+
+
+def __unpack_steps(packed):
+    """
+    Decode several packed lists of steps, resolving all their term ids in a single round trip
+    :param packed:
+    :return:
+    """
+    packed_ids = [__unpack_ids(data) for data in packed]
+    ids = list(set([i for p_ids in packed_ids for i in p_ids]))
+    terms = dict(zip(ids, index.r.hmget(TERMS_KEY, ids))) if ids else {}
+    return [[{'property': terms[p_ids[i]], 'type': terms[p_ids[i + 1]]} for i in xrange(0, len(p_ids), 2)]
+            for p_ids in packed_ids]
+
+
+def migrate_paths():
+    """
+    Convert the paths and cycles stored by previous versions (as the repr of their list of steps) to the
+    packed encoding. Indexes that already have a term dictionary are left as they are.
+    :return: The number of paths and cycles that were converted
+    """
+    global paths_checked
+    paths_checked = True
+    if index.r.exists(TERM_IDS_KEY):
+        return 0
+    keys = index.r.keys('paths:*') + [k for k in ['cycles'] if index.r.exists(k)]
+    if not keys:
+        return 0
+
+    # Terms are interned (and paths rewritten) while no calculation of paths is running
+    with index.r.lock(LOCK_KEY, timeout=app.config.get('PATHS_LOCK_TIMEOUT')):
+        if index.r.exists(TERM_IDS_KEY):
+            return 0
+        keys = index.r.keys('paths:*') + [k for k in ['cycles'] if index.r.exists(k)]
+        log.info('Converting the paths and cycles of {} keys to the packed encoding...'.format(len(keys)))
+        legacy = dict([(k, [(score, ast.literal_eval(member)) for member, score in
+                            index.r.zrange(k, 0, -1, withscores=True)]) for k in keys])
+        term_ids = __intern_terms(set([step[f] for members in legacy.values() for _, steps in members
+                                       for step in steps for f in ['property', 'type']]))
+        with index.r.pipeline() as pipe:
+            pipe.multi()
+            for k, members in legacy.items():
+                pipe.delete(k)
+                for score, steps in members:
+                    pipe.zadd(k, score, __pack_steps(steps, term_ids))
+            pipe.execute()
+    return sum([len(members) for members in legacy.values()])
 
 
 def __build_directed_graph(generic=False, graph=None):
@@ -64,17 +207,18 @@ def __build_directed_graph(generic=False, graph=None):
         graph.clear()
 
     graph.add_nodes_from(index.get_types(), ty='type')
-    for node in index.get_properties():
-        p_dict = index.get_property(node)
+    p_dicts = index.get_properties_bulk(index.get_properties())
+    t_dicts = {}
+    if generic:
+        t_dicts = index.get_types_bulk(
+            set.union(set([]), *[set(p['domain'] + p['range']) for p in p_dicts.values()]))
+    for node, p_dict in p_dicts.items():
         dom = set(p_dict.get('domain'))
         if generic:
-            dom = filter(lambda x: not set.intersection(set(index.get_type(x)['super']), dom), dom)
+            dom = filter(lambda x: not set.intersection(set(t_dicts.get(x, {}).get('super', [])), dom), dom)
         ran = set(p_dict.get('range'))
-        if generic:
-            try:
-                ran = filter(lambda x: not set.intersection(set(index.get_type(x)['super']), ran), ran)
-            except TypeError:
-                pass
+        if generic and all([x in t_dicts for x in ran]):
+            ran = filter(lambda x: not set.intersection(set(t_dicts[x]['super']), ran), ran)
         edges = [(d, node) for d in dom]
         if p_dict.get('type') == 'object':
             edges.extend([(node, r) for r in ran])
@@ -85,192 +229,782 @@ def __build_directed_graph(generic=False, graph=None):
     return graph
 
 
-def __build_paths(node, root, steps=None, level=0, path_graph=None, cache=None):
+def __ancestors(node):
     """
-
+    Return the elements from which there is a walk to a node of the graph
     :param node:
-    :param root:
-    :param steps:
     :return:
     """
+    found = set([])
+    pending = [node]
+    while pending:
+        for pred in pgraph.predecessors(pending.pop()):
+            if pred not in found:
+                found.add(pred)
+                pending.append(pred)
+    found.discard(node)
+    return found
+
+
+class GraphSnapshot(object):
+    """
+    Read-only copy of the predecessors of every node of the graph, which is all that path enumeration needs.
+    It is what process workers load instead of the whole graph.
+    """
 
-    def contains_cycle(graph):
-        return bool(list(nx.simple_cycles(graph)))
+    def __init__(self, pred):
+        """
 
-    paths = []
+        :param pred: A dictionary of node -> predecessors
+        """
+        self.__pred = pred
+
+    def predecessors(self, node):
+        return list(self.__pred[node])
+
+
+def __root_paths(n, ty, cache, limits):
+    """
+    Enumerate the paths to a root node of the graph, as they are found
+    :param n:
+    :param ty: The kind of node ('type' or 'prop')
+    :param cache: The memoization cache of sub-paths
+    :param limits: The maximum number of steps of a path and of paths to memoize
+    :return: A generator of paths
+    """
+    log.debug('[START] Calculating paths to {}'.format(n))
+    sources = [n]
+    if ty == 'type':
+        sources = pgraph.predecessors(n)
+    for p in sources:
+        log.debug('Following root [{}] predecessor property {}'.format(n, p))
+        for path in __build_paths(p, n, cache=cache, max_length=limits['max-length'],
+                                  max_paths=limits['max-paths']):
+            yield path
+    log.debug('[END] Calculated paths for {}'.format(n))
+
+
+def __bounded_paths(n, ty, cache, term_ids, limits, truncated):
+    """
+    Enumerate the packed paths to a root node within the limits
+    :param n:
+    :param ty:
+    :param cache:
+    :param term_ids: The term dictionary
+    :param limits:
+    :param truncated: The set of elements whose paths exceed the limits, where n is added if it does
+    :return: A generator of packed paths
+    """
+    max_length, max_paths = limits['max-length'], limits['max-paths']
+    for i, path in enumerate(__root_paths(n, ty, cache, limits)):
+        if max_paths and i == max_paths:
+            truncated.add(n)
+            break
+        if max_length and len(path) == max_length and __cut_walk(path):
+            truncated.add(n)
+        yield __pack_steps(path, term_ids)
+
+
+def __cut_walk(path):
+    """
+    Tell whether the walk of a path that reaches the maximum length was cut, i.e. whether it could go further
+    :param path:
+    :return:
+    """
+    last = path[-1]['type']
+    visited = set([step['property'] for step in path]).union([step['type'] for step in path[:-1]])
+    if last in visited:
+        return False
+    return any([p not in visited for p in pgraph.predecessors(last)])
+
+
+def start_workers():
+    """
+    Fork the configured path worker processes, if any. It must be called before any thread is started.
+    Workers reach the index through Redis, so they cannot be used with the in-memory store.
+    :return:
+    """
+    global workers
+    processes = app.config.get('PATHS_PROCESSES', 0)
+    if workers is not None or processes <= 1:
+        return
+    if app.config.get('INDEX_STORE', 'redis') == 'memory':
+        log.warning('Path worker processes cannot share an in-memory index, so threads are used instead')
+        return
+    # Workers inherit the store once it is set up (and the connections of its pool are renewed on fork)
+    index.r.get_object()
+    workers = multiprocessing.Pool(processes)
+    log.info('Started {} path worker processes'.format(processes))
+
+
+def stop_workers():
+    """
+    Terminate the path worker processes
+    :return:
+    """
+    global workers
+    if workers is not None:
+        workers.terminate()
+        workers.join()
+        workers = None
+
+
+def __worker_pids():
+    """
+    Return the ids of the current path worker processes. A pool replaces the workers that die, but the tasks
+    they were running are lost, so a change in these ids means that some result will never come.
+    :return:
+    """
+    return set([p.pid for p in workers._pool])
+
+
+def __stage_snapshot(staging):
+    """
+    Stage the predecessors of every node of the graph for path worker processes
+    :param staging:
+    :return:
+    """
+    index.r.set('{}graph'.format(staging), json.dumps(dict([(n, pgraph.predecessors(n)) for n in pgraph.nodes()])))
+
+
+def __load_worker_state(staging):
+    """
+    Load the snapshot of the graph and the term dictionary of a calculation in a path worker process, once
+    :param staging: The prefix of the keys of the calculation
+    :return:
+    """
+    global pgraph, worker_state
+    if worker_state is None or worker_state['staging'] != staging:
+        def enc(term):
+            return term.encode('utf-8')
+
+        pred = json.loads(index.r.get('{}graph'.format(staging)))
+        pgraph = GraphSnapshot(dict([(enc(n), map(enc, ps)) for n, ps in pred.items()]))
+        term_ids = dict([(t, int(i)) for t, i in index.r.hgetall(TERM_IDS_KEY).items()])
+        worker_state = {'staging': staging, 'cache': {}, 'term_ids': term_ids}
+    return worker_state
+
+
+def __calculate_bucket(task):
+    """
+    Enumerate the paths of a bucket of roots in a worker process, sharing its memoization cache. Paths are
+    staged as they are enumerated, so the worker only holds those of the root in progress.
+    :param task: The staging prefix and limits of the calculation, and a list of (node, kind)
+    :return: A dictionary of node -> number of staged paths, and the roots whose paths exceed the limits
+    """
+    staging, limits, roots = task
+    n_paths = {}
+    truncated = set([])
+    for n, ty in roots:
+        # A calculation that failed drops its staged keys (the snapshot included), so the rest is abandoned
+        if not index.r.exists('{}graph'.format(staging)):
+            break
+        state = __load_worker_state(staging)
+        n_paths[n] = __store_paths('{}paths:{}'.format(staging, n),
+                                   __bounded_paths(n, ty, state['cache'], state['term_ids'], limits, truncated))
+    return n_paths, truncated
+
+
+def __partition(roots, n_buckets):
+    """
+    Distribute roots in buckets of similar estimated cost (the number of their ancestors), heaviest first
+    :param roots: A list of (node, kind)
+    :param n_buckets:
+    :return:
+    """
+    costs = sorted([(len(__ancestors(n)) + 1, (n, ty)) for n, ty in roots], reverse=True)
+    buckets = [(0, i, []) for i in range(n_buckets)]
+    for cost, root in costs:
+        load, i, bucket = heapq.heappop(buckets)
+        bucket.append(root)
+        heapq.heappush(buckets, (load + cost, i, bucket))
+    return [bucket for _, _, bucket in buckets if bucket]
+
+
+def __build_paths(node, root, steps=None, level=0, visited=None, cache=None, max_length=0, max_paths=0):
+    """
+    Enumerate the paths that lead to a property by walking the graph backwards in depth, avoiding cycles.
+    Paths are generated as they are found.
+    :param node:
+    :param root:
+    :param steps: The stack of steps walked so far
+    :param visited: The set of types and properties in the walk so far, updated as steps are pushed and popped
+    :param cache: Memoized results (and ancestors) by node, to be shared by every call of a same graph
+    :param max_length: The maximum number of steps of a path (0 for no limit); longer walks are cut
+    :param max_paths: The maximum number of paths of a memoized result (0 for no limit)
+    :return:
+    """
     if steps is None:
         steps = []
-    if path_graph is None:
-        path_graph = nx.DiGraph()
+    if visited is None:
+        visited = set([node])
     if cache is None:
         cache = {}
 
+    # Only visited ancestors of the node can constrain the walk from it, so they identify its results, which
+    # are adapted to the steps left
+    ancestors = cache.setdefault('ancestors', {})
+    if node not in ancestors:
+        ancestors[node] = __ancestors(node)
+    budget = max_length - len(steps) if max_length else None
+    key = (node, frozenset(visited.intersection(ancestors[node])))
+    memo = cache.setdefault('paths', {})
+    memoized = __memoized(memo.get(key), budget)
+    if memoized is not None:
+        for path in memoized:
+            yield path
+        return
+
     log.debug(
             '[{}][{}] building paths to {}, with root {} and {} previous steps'.format(root, level, node, root,
                                                                                        len(steps)))
 
+    # Results are only memoized if they are not too many, and only once they are complete
+    paths = []
     pred = set(pgraph.predecessors(node))
     for t in [x for x in pred]:
-        new_path_graph = path_graph.copy()
-        new_path_graph.add_nodes_from([t, node])
-        new_path_graph.add_edges_from([(t, node)])
+        # A type that is already in the walk closes a cycle, so the path cannot go any further
+        closed = t in visited
+        visited.add(t)
 
         step = {'property': node, 'type': t}
         path = [step]
-        new_steps = steps[:]
-        new_steps.append(step)
+        steps.append(step)
         log.debug('[{}][{}] added a new step {} in the path to {}'.format(root, level, (t, node), node))
 
         any_subpath = False
-        next_steps = [x for x in pgraph.predecessors(t)]
+        next_steps = [] if budget == 1 else [x for x in pgraph.predecessors(t)]
 
         for p in next_steps:
             log.debug('[{}][{}] following {} as a pred property of {}'.format(root, level, p, t))
-            extended_new_path_graph = new_path_graph.copy()
-            extended_new_path_graph.add_node(p)
-            extended_new_path_graph.add_edges_from([(p, t)])
-            if contains_cycle(extended_new_path_graph):
+            if closed or p in visited:
                 continue
-            sub_paths = __build_paths(p, root, new_steps[:], level=level + 1, path_graph=extended_new_path_graph,
-                                      cache=cache)
+            visited.add(p)
+            for sp in __build_paths(p, root, steps, level=level + 1, visited=visited, cache=cache,
+                                    max_length=max_length, max_paths=max_paths):
+                any_subpath = True
+                found = path + sp
+                if paths is not None and max_paths and len(paths) == max_paths:
+                    paths = None
+                elif paths is not None:
+                    paths.append(found)
+                yield found
+            visited.remove(p)
+        if not any_subpath:
+            if paths is not None and max_paths and len(paths) == max_paths:
+                paths = None
+            elif paths is not None:
+                paths.append(path)
+            yield path
+
+        steps.pop()
+        if not closed:
+            visited.remove(t)
+
+    log.debug('[{}][{}] returned all paths to {}, with root {} and {} previous steps'.format(root, level, node,
+                                                                                             root, len(steps)))
+    if paths is not None:
+        memo[key] = (budget, paths)
+
+
+def __memoized(entry, budget):
+    """
+    Adapt the memoized paths from a node, which were enumerated with some budget of steps, to another budget
+    :param entry: The budget the paths were enumerated with (None for no limit) and the paths, or None
+    :param budget: The number of steps left (None for no limit)
+    :return: The paths, or None if they cannot be adapted
+    """
+    if entry is None:
+        return None
+    walked, paths = entry
+    if budget == walked:
+        return paths
+    if walked is not None and (budget is None or budget > walked):
+        # The paths of a shorter walk are complete only if none of them could have been cut
+        if any([len(path) >= walked for path in paths]):
+            return None
+        return paths
+    # Walks with fewer steps left are cut, so the paths that share their first steps become a single one
+    adapted = []
+    cut = set([])
+    for path in paths:
+        if len(path) >= budget:
+            path = path[:budget]
+            steps = tuple([(step['property'], step['type']) for step in path])
+            if steps in cut:
+                continue
+            cut.add(steps)
+        adapted.append(path)
+    return adapted
 
-            any_subpath = any_subpath or len(sub_paths)
-            for sp in sub_paths:
-                paths.append(path + sp)
-        if (len(next_steps) and not any_subpath) or not len(next_steps):
-            paths.append(path)
 
-    log.debug(
-            '[{}][{}] returning {} paths to {}, with root {} and {} previous steps'.format(root, level, len(paths),
-                                                                                           node,
-                                                                                           root,
-                                                                                           len(steps)))
-    return paths
+def __graph_snapshot(graph, t_dicts):
+    """
+    Describe the graph the stored paths are calculated from: kinds of nodes, edges and subtypes
+    :param graph:
+    :param t_dicts: Descriptions of the known types
+    :return:
+    """
+    return {'nodes': dict([(n, d.get('ty')) for n, d in graph.nodes(data=True)]),
+            'edges': sorted(graph.edges()),
+            'sub': dict([(t, sorted(t_dict['sub'])) for t, t_dict in t_dicts.items()])}
 
 
-def calculate_paths():
+def __load_snapshot():
+    """
+    Read the snapshot of the graph used by the last calculation of paths
+    :return: The snapshot, or None if there is none
     """
+    snapshot = index.r.get(GRAPH_KEY)
+    if snapshot is None:
+        return None
+    snapshot = json.loads(snapshot)
+
+    def enc(term):
+        return term.encode('utf-8')
 
+    return {'nodes': dict([(enc(n), ty) for n, ty in snapshot['nodes'].items()]),
+            'edges': [(enc(u), enc(v)) for u, v in snapshot['edges']],
+            'sub': dict([(enc(t), map(enc, sub)) for t, sub in snapshot['sub'].items()])}
+
+
+def __affected_nodes(old, new):
+    """
+    Find the nodes whose paths may have changed from a snapshot of the graph to another: those that are
+    downstream of an edge or node that changed, and the types with any such subtype
+    :param old:
+    :param new:
     :return:
     """
+    changed_edges = set(old['edges']).symmetric_difference(new['edges'])
+    changed = set([v for _, v in changed_edges])
+    changed.update([n for n in set(old['nodes']).union(new['nodes']) if old['nodes'].get(n) != new['nodes'].get(n)])
 
-    def __find_matching_cycles(_elm):
-        for j, c in enumerate(g_cycles):
-            extended_elm = [_elm]
-            if index.is_type(_elm):
-                extended_elm.extend(index.get_type(_elm)["super"])
+    affected = set(changed)
+    for snapshot in [old, new]:
+        graph = nx.DiGraph()
+        graph.add_nodes_from(snapshot['nodes'])
+        graph.add_edges_from(snapshot['edges'])
+        for n in changed.intersection(graph.nodes()):
+            affected.update(nx.descendants(graph, n))
 
-            if len([c for e in extended_elm if e in c]):
-                yield j
+    for snapshot in [old, new]:
+        for t, sub in snapshot['sub'].items():
+            if old['sub'].get(t) != new['sub'].get(t) or affected.intersection(sub):
+                affected.add(t)
+    return affected
 
-    def __store_path(_i, _path):
-        pipe.zadd('paths:{}'.format(elm), _i, _path)
 
-    def __calculate_node_paths(n, d):
-        log.debug('[START] Calculating paths to {} with data {}'.format(n, d))
-        _paths = []
-        if d.get('ty') == 'type':
-            for p in pgraph.predecessors(n):
-                log.debug('Following root [{}] predecessor property {}'.format(n, p))
-                _paths.extend(__build_paths(p, n))
-        else:
-            _paths.extend(__build_paths(n, n))
-        log.debug('[END] {} paths for {}'.format(len(_paths), n))
-        if len(_paths):
-            node_paths[n] = _paths
+def __cycle_steps(cy, types):
+    """
+    Turn a cycle of the graph (list of nodes) into a list of steps
+    :param cy:
+    :param types: The set of known types
+    :return:
+    """
+    cycle = []
+    t_cycle = None
+    for elm in cy:
+        if elm in types:
+            t_cycle = elm
+        elif t_cycle is not None:
+            cycle.append({'property': elm, 'type': t_cycle})
+            t_cycle = None
+    if t_cycle is not None:
+        cycle.append({'property': cy[0], 'type': t_cycle})
+    return cycle
 
-    log.info('Calculating paths...')
-    match_elm_cycles.clear()
-    start_time = dt.now()
 
-    __build_directed_graph(graph=pgraph)
-    g_graph = __build_directed_graph(generic=True)
+def __cycle_key(steps):
+    """
+    Identify a cycle regardless of the step it starts with
+    :param steps:
+    :return:
+    """
+    pairs = [(step['property'], step['type']) for step in steps]
+    if not pairs:
+        return ()
+    start = pairs.index(min(pairs))
+    return tuple(pairs[start:] + pairs[:start])
 
-    cycle_keys = index.r.keys('*cycles*')
-    for ck in cycle_keys:
-        index.r.delete(ck)
-    g_cycles = list(nx.simple_cycles(g_graph))
-    with index.r.pipeline() as pipe:
-        pipe.multi()
-        for i, cy in enumerate(g_cycles):
-            print cy
-            cycle = []
-            t_cycle = None
-            for elm in cy:
-                if index.is_type(elm):
-                    t_cycle = elm
-                elif t_cycle is not None:
-                    cycle.append({'property': elm, 'type': t_cycle})
-                    t_cycle = None
-            if t_cycle is not None:
-                cycle.append({'property': cy[0], 'type': t_cycle})
-            pipe.zadd('cycles', i, cycle)
-        pipe.execute()
 
-    locks = __lock_key_pattern('paths:*')
-    keys = [k for (k, _) in locks]
-    if len(keys):
-        index.r.delete(*keys)
+def __bounded_cycles(graph, max_nodes):
+    """
+    Enumerate the elementary cycles of a graph that have at most a number of nodes. Every cycle is found from
+    its least node, walking only through greater ones.
+    :param graph:
+    :param max_nodes:
+    :return: A generator of cycles (lists of nodes)
+    """
+    order = dict([(n, i) for i, n in enumerate(sorted(graph.nodes()))])
+    for start in sorted(graph.nodes()):
+        cycle = [start]
+        on_cycle = set(cycle)
+        pending = [iter(graph.successors(start))]
+        while pending:
+            nxt = next(pending[-1], None)
+            if nxt is None:
+                pending.pop()
+                on_cycle.discard(cycle.pop())
+            elif nxt == start:
+                yield list(cycle)
+            elif nxt not in on_cycle and order[nxt] > order[start] and len(cycle) < max_nodes:
+                cycle.append(nxt)
+                on_cycle.add(nxt)
+                pending.append(iter(graph.successors(nxt)))
+
+
+def __cycle_components(graph, max_length):
+    """
+    Decompose a graph in the strongly connected components that may contain cycles, since there cannot be
+    any cycle across components
+    :param graph:
+    :param max_length: The maximum number of steps of a cycle (0 for no limit)
+    :return: A list of (signature, component subgraph); the signature changes with the edges of the component
+    and the maximum length
+    """
+    components = []
+    for nodes in nx.strongly_connected_components(graph):
+        if len(nodes) == 1 and not graph.has_edge(*(list(nodes) * 2)):
+            continue
+        subgraph = graph.subgraph(nodes)
+        signature = hashlib.sha1(json.dumps([max_length, sorted(subgraph.edges())])).hexdigest()
+        components.append((signature, subgraph))
+    return sorted(components, key=lambda component: sorted(component[1].nodes()))
 
-    node_paths = {}
-    futures = []
-    for node, data in pgraph.nodes(data=True):
-        futures.append(th_pool.submit(__calculate_node_paths, node, data))
-    wait(futures, timeout=None, return_when=ALL_COMPLETED)
-    # th_pool.shutdown()
 
-    for ty in [_ for _ in index.get_types() if _ in node_paths]:
-        for sty in [_ for _ in index.get_type(ty)['sub'] if _ in node_paths]:
-            node_paths[ty].extend(node_paths[sty])
+def __component_cycles(component, max_length):
+    """
+    Enumerate the elementary cycles of a strongly connected component
+    :param component:
+    :param max_length: The maximum number of steps of a cycle (0 for no limit)
+    :return:
+    """
+    if not max_length:
+        return nx.simple_cycles(component)
+    # Cycles go through a type and a property per step
+    return __bounded_cycles(component, max_length * 2)
 
-    node_paths = node_paths.items()
 
-    log.debug('preparing to persist the calculated paths...{}'.format(len(node_paths)))
+def cycle_components():
+    """
+    Summarize the strongly connected components of the graph that contain cycles
+    :return:
+    """
+    return sorted([json.loads(summary) for summary in index.r.hgetall(COMPONENTS_KEY).values()],
+                  key=lambda summary: summary['elements'])
 
-    with index.r.pipeline() as pipe:
-        pipe.multi()
-        # with ThreadPoolExecutor(multiprocessing.cpu_count()) as th_pool:
-        for (elm, paths) in node_paths:
-            futures = []
-            for (i, path) in enumerate(paths):
-                futures.append(th_pool.submit(__store_path, i, path))
-                for step in path:
-                    step_ty = step.get('type')
-                    if step_ty not in match_elm_cycles:
-                        match_elm_cycles[step_ty] = __find_matching_cycles(step_ty)
-                    step_pr = step.get('property')
-                    if step_pr not in match_elm_cycles:
-                        match_elm_cycles[step_pr] = __find_matching_cycles(step_pr)
-            wait(futures, timeout=None, return_when=ALL_COMPLETED)
+
+def path_limits(elm=None):
+    """
+    Describe the limits of the enumeration of paths
+    :param elm: An element to tell whether its stored paths exceeded the limits
+    :return:
+    """
+    limits = {'max-length': app.config.get('PATHS_MAX_LENGTH', 0),
+              'max-paths': app.config.get('PATHS_MAX_PER_ELEMENT', 0)}
+    if elm is not None:
+        stored = index.r.get(LIMITS_KEY)
+        if stored is not None:
+            limits = json.loads(stored)
+        limits['truncated'] = index.r.sismember(TRUNCATED_KEY, elm)
+    return limits
+
+
+def __store_paths(key, packed):
+    """
+    Store packed paths in batches
+    :param key:
+    :param packed: An iterable of packed paths
+    :return: The number of paths
+    """
+    n = 0
+    for batch in chunks(packed, app.config.get('PATHS_BATCH_SIZE', 1000)):
+        with index.r.pipeline() as pipe:
+            pipe.multi()
+            for i, path in enumerate(batch):
+                pipe.zadd(key, n + i, path)
             pipe.execute()
-        # th_pool.shutdown()
+        n += len(batch)
+    return n
 
-        # Store type and property cycles
-        for elm in match_elm_cycles.keys():
-            for c in match_elm_cycles[elm]:
-                pipe.sadd('cycles:{}'.format(elm), c)
-        pipe.execute()
-        for t in [_ for _ in index.get_types() if _ not in match_elm_cycles]:
-            for c in __find_matching_cycles(t):
-                pipe.sadd('cycles:{}'.format(t), c)
-        pipe.execute()
 
-    for _, l in locks:
-        l.release()
+class PathsLock(object):
+    """
+    The lock of a calculation of paths. It only expires if it is not extended in time, which its owner keeps
+    doing while it is alive, so the staged paths of any other calculation belong to one that died.
+    """
 
-    log.info('Found {} paths in {}ms'.format(len(index.r.keys('paths:*')),
-                                             (dt.now() - start_time).total_seconds() * 1000))
+    def __init__(self, timeout):
+        self.__timeout = timeout
+        self.__lock = index.r.lock(LOCK_KEY, timeout=timeout)
+        self.__renewed = None
 
+    @property
+    def interval(self):
+        """
+        Seconds between checks of the lock (None if it never expires)
+        :return:
+        """
+        return self.__timeout / 4.0 if self.__timeout else None
 
-def __lock_key_pattern(pattern):
+    def keep(self, force=False):
+        """
+        Extend the lock back to its full timeout once half of it has elapsed (or right away if forced). It must
+        be called by the thread that acquired the lock.
+        :param force: Whether to extend it anyway, which checks that it is still owned
+        :return:
+        """
+        if not self.__timeout:
+            return
+        elapsed = time.time() - self.__renewed
+        if force or elapsed >= self.__timeout / 2.0:
+            try:
+                self.__lock.extend(elapsed)
+            except LockError as e:
+                raise FountainError('The calculation of paths lost its lock: {}'.format(e.message))
+            self.__renewed = time.time()
+
+    def __enter__(self):
+        self.__lock.acquire()
+        self.__renewed = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            self.__lock.release()
+        except LockError as e:
+            log.warning('The lock of the calculation of paths could not be released: {}'.format(e.message))
+
+
+def calculate_paths():
     """
+    Update the stored paths and cycles. Only the paths of the nodes that are affected by the changes in the
+    graph since the last calculation are enumerated and rewritten; unchanged cycles keep their ids.
+    Calculations are serialized by a lock, and their results are published all at once, so readers keep
+    getting the previous ones until then.
+    :return:
+    """
+    with PathsLock(app.config.get('PATHS_LOCK_TIMEOUT')) as lock:
+        # Staged keys of calculations that died (those of a running one are not, since it would hold the lock)
+        orphans = index.r.keys('{}*'.format(STAGING_PREFIX))
+        if orphans:
+            log.info('Deleting {} staged keys of unfinished calculations of paths'.format(len(orphans)))
+            index.r.delete(*orphans)
+        staging = '{}{}:'.format(STAGING_PREFIX, uuid4().hex)
+        try:
+            __update_paths(staging, lock)
+        finally:
+            staged = index.r.keys('{}*'.format(staging))
+            if staged:
+                index.r.delete(*staged)
+
 
-    :param pattern:
+def __update_paths(staging, lock):
+    """
+    Calculate the paths and cycles that changed. New paths are written to a staging namespace, and then
+    everything is published in a single transaction.
+    :param staging: The prefix of the keys to stage paths in
+    :param lock: The lock of the calculation, to be kept while it runs
     :return:
     """
-    pattern_keys = index.r.keys(pattern)
-    for k in pattern_keys:
-        yield k, index.r.lock(k)
+
+    def __calculate_node_paths(n, ty):
+        n_paths[n] = __store_paths('{}paths:{}'.format(staging, n),
+                                   __bounded_paths(n, ty, paths_cache, term_ids, limits, truncated))
+
+    log.info('Calculating paths...')
+    match_elm_cycles.clear()
+    start_time = dt.now()
+
+    __build_directed_graph(graph=pgraph)
+    g_graph = __build_directed_graph(generic=True)
+    term_ids = __intern_terms(set(pgraph.nodes()).union(g_graph.nodes()))
+    types = index.get_types()
+    t_dicts = index.get_types_bulk(types)
+
+    snapshot = __graph_snapshot(pgraph, t_dicts)
+    previous = __load_snapshot()
+    limits = path_limits()
+    affected = None
+    if previous is not None:
+        affected = __affected_nodes(previous, snapshot)
+        # Paths that were enumerated with other limits are all recalculated
+        if json.loads(index.r.get(LIMITS_KEY) or 'null') != limits:
+            affected.update(previous['nodes'], snapshot['nodes'])
+        log.info('{} nodes are affected by the changes in the graph'.format(len(affected)))
+
+    # Cycles that were already known keep their ids
+    known_cycles = {}
+    known_steps = {}
+    known_components = {}
+    next_cid = 0
+    if affected is not None:
+        stored = index.r.zrange('cycles', 0, -1, withscores=True)
+        for (member, score), steps in zip(stored, __unpack_steps([m for m, _ in stored])):
+            known_cycles[__cycle_key(steps)] = (int(score), member)
+            known_steps[int(score)] = steps
+            next_cid = max(next_cid, int(score) + 1)
+        known_components = dict([(signature, json.loads(summary)) for signature, summary in
+                                 index.r.hgetall(COMPONENTS_KEY).items()])
+    max_cycle_length = app.config.get('CYCLES_MAX_LENGTH', 0)
+    cycles = {}
+    components = {}
+    for signature, component in __cycle_components(g_graph, max_cycle_length):
+        summary = known_components.get(signature)
+        if summary is not None and all([cid in known_steps for cid in summary['cycles']]):
+            # The cycles of a component that did not change are not discovered again
+            for cid in summary['cycles']:
+                steps = known_steps[cid]
+                cycles[cid] = ([e for step in steps for e in (step['type'], step['property'])], steps)
+        else:
+            summary = {'elements': sorted(component.nodes()), 'cycles': [], 'max-length': max_cycle_length}
+            for cy in __component_cycles(component, max_cycle_length):
+                steps = __cycle_steps(cy, t_dicts)
+                cid, _ = known_cycles.get(__cycle_key(steps), (None, None))
+                if cid is None or cid in cycles:
+                    cid = next_cid
+                    next_cid += 1
+                cycles[cid] = (cy, steps)
+                summary['cycles'].append(cid)
+        components[signature] = summary
+    log.info('{} cycles in {} strongly connected components'.format(len(cycles), len(components)))
+    known_cids = set([cid for cid, _ in known_cycles.values()])
+    obsolete_cycles = [member for cid, member in known_cycles.values() if cid not in cycles]
+
+    nodes = set(pgraph.nodes()) if affected is None else affected.intersection(pgraph.nodes())
+    stale_keys = index.r.keys('paths:*') if affected is None else ['paths:{}'.format(n) for n in affected]
+
+    # Paths are staged as they are enumerated, so only those of the roots in progress are held in memory
+    n_paths = {}
+    truncated = set([])
+    roots = [(node, data.get('ty')) for node, data in pgraph.nodes(data=True) if node in nodes]
+    processes = app.config.get('PATHS_PROCESSES', 0)
+    if workers is not None and len(roots) > processes:
+        # Traversals are CPU-bound, so they are spread over worker processes, which load a snapshot of the
+        # graph once per calculation
+        __stage_snapshot(staging)
+        tasks = [(staging, limits, bucket) for bucket in __partition(roots, processes * 4)]
+        pids = __worker_pids()
+        buckets = workers.imap_unordered(__calculate_bucket, tasks)
+        for _ in tasks:
+            while True:
+                try:
+                    bucket_paths, bucket_truncated = buckets.next(1)
+                    break
+                except multiprocessing.TimeoutError:
+                    if __worker_pids() != pids:
+                        raise FountainError('A path worker process died, so its paths are missing')
+                    lock.keep()
+            lock.keep()
+            n_paths.update(bucket_paths)
+            truncated.update(bucket_truncated)
+    else:
+        # Sub-paths are shared by all the roots
+        paths_cache = {}
+        futures = []
+        for node, ty in roots:
+            futures.append(th_pool.submit(__calculate_node_paths, node, ty))
+        while wait(futures, timeout=lock.interval, return_when=ALL_COMPLETED).not_done:
+            lock.keep()
+        for f in futures:
+            f.result()
+        # th_pool.shutdown()
+
+    # Paths of types include those of their subtypes, which are referred to instead of copied (the stored
+    # paths of subtypes that were not affected are still valid). Affected nodes that are no longer in the graph
+    # are left out, as their paths are gone.
+    if affected is not None:
+        truncated.update(set(index.r.smembers(TRUNCATED_KEY)).difference(affected))
+    sub_types = list(set([sty for ty in types if n_paths.get(ty) for sty in t_dicts[ty]['sub']]).difference(nodes))
+    with index.r.pipeline(transaction=False) as pipe:
+        for sty in sub_types:
+            pipe.zcard('paths:{}'.format(sty))
+        sub_counts = dict(zip(sub_types, pipe.execute()))
+    sub_counts.update(n_paths)
+    path_refs = {}
+    for ty in [_ for _ in types if n_paths.get(_)]:
+        refs = [sty for sty in t_dicts[ty]['sub'] if sub_counts.get(sty)]
+        if refs:
+            path_refs[ty] = refs
+        n_refs = sum([sub_counts[sty] for sty in refs])
+        if truncated.intersection(refs) or (limits['max-paths'] and n_paths[ty] + n_refs > limits['max-paths']):
+            truncated.add(ty)
+
+    log.debug('staged the calculated paths of {} elements'.format(len([_ for _ in n_paths.values() if _])))
+    if truncated.intersection(nodes):
+        log.warning('The paths of {} elements exceed the limits {}'.format(len(truncated.intersection(nodes)),
+                                                                           limits))
+
+    # Type and property cycles, for every element in a path (the properties with a domain and the types in it)
+    # and every type
+    elms = set(types)
+    elms.update([e for u, v in pgraph.edges() if pgraph.node[v].get('ty') == 'prop' for e in (u, v)])
+    # The cycles of an element are those that go through it or any of its supertypes
+    member_cycles = {}
+    for cid, (cy, _) in cycles.items():
+        for e in set(cy):
+            member_cycles.setdefault(e, set([])).add(str(cid))
+    for elm in elms:
+        extended_elm = [elm] + t_dicts.get(elm, {}).get('super', [])
+        match_elm_cycles[elm] = set.union(set([]), *[member_cycles.get(e, set([])) for e in extended_elm])
+    cycle_keys = dict([(k, set([])) for k in index.r.keys('cycles:*')])
+    cycle_keys.update([('cycles:{}'.format(elm), c) for elm, c in match_elm_cycles.items() if c])
+    with index.r.pipeline(transaction=False) as pipe:
+        for k in cycle_keys:
+            pipe.smembers(k)
+        current = dict(zip(cycle_keys.keys(), pipe.execute()))
+
+    # Renames of missing keys would fail inside the transaction (which is not rolled back), so nothing is
+    # published unless every staged key is there and the lock is still owned (for at least half its timeout)
+    staged = ['{}paths:{}'.format(staging, n) for n in n_paths if n_paths[n]]
+    with index.r.pipeline(transaction=False) as pipe:
+        for k in staged:
+            pipe.exists(k)
+        missing = [k for k, exists in zip(staged, pipe.execute()) if not exists]
+    if missing:
+        raise FountainError('{} staged keys of the calculation of paths are missing'.format(len(missing)))
+    lock.keep(force=True)
+
+    with index.r.pipeline() as pipe:
+        pipe.multi()
+        if affected is None:
+            pipe.delete('cycles')
+        elif obsolete_cycles:
+            pipe.zrem('cycles', *obsolete_cycles)
+        for cid, (_, steps) in cycles.items():
+            if cid not in known_cids:
+                pipe.zadd('cycles', cid, __pack_steps(steps, term_ids))
+        pipe.delete(COMPONENTS_KEY)
+        if components:
+            pipe.hmset(COMPONENTS_KEY, dict([(signature, json.dumps(summary))
+                                             for signature, summary in components.items()]))
+        if stale_keys:
+            pipe.delete(*stale_keys)
+        for n in [_ for _ in n_paths if n_paths[_]]:
+            pipe.rename('{}paths:{}'.format(staging, n), 'paths:{}'.format(n))
+        for k, c in cycle_keys.items():
+            if c != current[k]:
+                pipe.delete(k)
+                if c:
+                    pipe.sadd(k, *c)
+        if affected is None:
+            pipe.delete(REFS_KEY)
+        elif affected:
+            pipe.hdel(REFS_KEY, *affected)
+        if path_refs:
+            pipe.hmset(REFS_KEY, dict([(ty, json.dumps(refs)) for ty, refs in path_refs.items()]))
+        pipe.set(GRAPH_KEY, json.dumps(snapshot))
+        pipe.delete(RESULTS_KEY)
+        pipe.set(GENERATION_KEY, uuid4().hex)
+        pipe.set(LIMITS_KEY, json.dumps(limits))
+        pipe.delete(TRUNCATED_KEY)
+        if truncated:
+            pipe.sadd(TRUNCATED_KEY, *truncated)
+        pipe.execute()
+
+    log.info('Updated the paths of {} elements in {}ms'.format(len(nodes),
+                                                               (dt.now() - start_time).total_seconds() * 1000))
 
 
 def __detect_redundancies(source, steps):
@@ -299,19 +1033,92 @@ def __detect_redundancies(source, steps):
     return steps
 
 
+def __steps_key(steps):
+    """
+    Hashable version of a list of steps
+    :param steps:
+    :return:
+    """
+    return tuple([(step['property'], step['type']) for step in steps])
+
+
+def __step_windows(steps):
+    """
+    Enumerate the lists of steps that __detect_redundancies may find in some steps: those that begin at the first
+    occurrence of a step and may wrap around the end
+    :param steps:
+    :return:
+    """
+    n = len(steps)
+    for start, step in enumerate(steps):
+        if steps.index(step) != start:
+            continue
+        for length in xrange(1, 2 * n - start + 1):
+            end = start + length
+            window = steps[start:end]
+            if end >= n:
+                window = window + steps[:end - n]
+            if len(window) == length:
+                yield window
+
+
 def find_path(elm):
     """
+    Return the seed paths and cycles of an element. Results are cached until paths or seeds change, and are
+    shared by all callers, which must not modify them.
+    :param elm:
+    :return:
+    """
+    with index.r.pipeline(transaction=False) as pipe:
+        pipe.get(GENERATION_KEY)
+        pipe.get(seeds.GENERATION_KEY)
+        generations = pipe.execute()
+    # Indexes that were never calculated by this version have no generations to tell changes by
+    if None in generations:
+        return __find_path(elm)
+    key = tuple([elm] + generations)
+    result = results.get(key)
+    if result is not None:
+        return result
+
+    shared = app.config.get('PATHS_SHARED_CACHE', False)
+    if shared:
+        cached = index.r.hget(RESULTS_KEY, elm)
+        if cached is not None:
+            cached = json.loads(cached)
+            if cached['generations'] == generations:
+                result = cached['paths'], cached['cycles']
+    if result is None:
+        result = __find_path(elm)
+        if shared:
+            index.r.hset(RESULTS_KEY, elm, json.dumps({'generations': generations, 'paths': result[0],
+                                                       'cycles': result[1]}))
+    results.set(key, result)
+    return result
+
+
+def __find_path(elm):
+    """
 
     :param elm:
     :return:
     """
+    if not paths_checked:
+        migrate_paths()
+
     seed_av = {}
+    type_cycles = {}
 
     def check_seed_availability(ty):
         if ty not in seed_av:
             seed_av[ty] = seeds.get_type_seeds(ty)
         return seed_av[ty]
 
+    def check_type_cycles(ty):
+        if ty not in type_cycles:
+            type_cycles[ty] = [int(c) for c in index.r.smembers('cycles:{}'.format(ty))]
+        return type_cycles[ty]
+
     def build_seed_path_and_identify_cycles(_seeds):
         """
 
@@ -320,15 +1127,35 @@ def find_path(elm):
         """
         sub_steps = list(reversed(path[:step_index + 1]))
         for _step in sub_steps:
-            cycle_ids.update([int(c) for c in index.r.smembers('cycles:{}'.format(_step.get('type')))])
+            cycle_ids.update(check_type_cycles(_step.get('type')))
         sub_path = {'cycles': list(cycle_ids), 'seeds': _seeds, 'steps': sub_steps}
 
-        if sub_path not in seed_paths:
+        key = (tuple(sub_path['cycles']), tuple(_seeds), __steps_key(sub_steps))
+        if key not in seed_path_keys:
+            seed_path_keys.add(key)
             seed_paths.append(sub_path)
         return cycle_ids
 
     seed_paths = []
-    paths = [(int(score), eval(path)) for path, score in index.r.zrange('paths:{}'.format(elm), 0, -1, withscores=True)]
+    seed_path_keys = set([])
+    # The paths of a type are its own ones followed by those of the subtypes it refers to, which share some of
+    # them (e.g. those of properties whose range includes the type and its subtypes). Only the first distinct
+    # ones, up to the limit, are taken (and no more than that are read of any element).
+    refs = json.loads(index.r.hget(REFS_KEY, elm) or '[]')
+    max_paths = path_limits(elm)['max-paths']
+    with index.r.pipeline(transaction=False) as pipe:
+        for e in [elm] + refs:
+            pipe.zrange('paths:{}'.format(e), 0, max_paths - 1, withscores=True)
+        elm_paths = pipe.execute()
+    packed_paths = []
+    distinct = set([])
+    for path, score in [p for e_paths in elm_paths for p in e_paths]:
+        if max_paths and len(packed_paths) == max_paths:
+            break
+        if path not in distinct:
+            distinct.add(path)
+            packed_paths.append((path, score))
+    paths = zip([int(score) for _, score in packed_paths], __unpack_steps([path for path, _ in packed_paths]))
 
     applying_cycles = set([])
     cycle_ids = set([int(c) for c in index.r.smembers('cycles:{}'.format(elm))])
@@ -349,18 +1176,44 @@ def find_path(elm):
         seed_cycles = build_seed_path_and_identify_cycles(req_type_seeds)
         applying_cycles = applying_cycles.union(set(seed_cycles))
 
-    filtered_seed_paths = []
-    for seed_path in seed_paths:
-        for sp in [_ for _ in seed_paths if _ != seed_path and _['seeds'] == seed_path['seeds']]:
-            if __detect_redundancies(sp["steps"], seed_path["steps"]) != seed_path['steps']:
-                filtered_seed_paths.append(seed_path)
+    # A seed path is redundant if another one with the same seeds is a window of its steps, so only its windows
+    # are looked up among the steps of the paths with the same seeds
+    seed_groups = {}
+    for i, seed_path in enumerate(seed_paths):
+        group = seed_groups.setdefault(tuple(seed_path['seeds']), {})
+        group.setdefault(__steps_key(seed_path['steps']), []).append(i)
+    filtered_seed_paths = set([])
+    for i, seed_path in enumerate(seed_paths):
+        group = seed_groups[tuple(seed_path['seeds'])]
+        for window in __step_windows(seed_path['steps']):
+            if [j for j in group.get(__steps_key(window), []) if j != i] and \
+                    __detect_redundancies(window, seed_path['steps']) != seed_path['steps']:
+                filtered_seed_paths.add(i)
                 break
 
-    applying_cycles = [{'cycle': int(cid), 'steps': eval(index.r.zrange('cycles', cid, cid).pop())} for cid in
-                       applying_cycles]
-    return [_ for _ in seed_paths if _ not in filtered_seed_paths], applying_cycles
+    # Cycles that disappeared (in a calculation published since the cycles of the types were read) are skipped
+    applying_cycles = list(applying_cycles)
+    with index.r.pipeline(transaction=False) as pipe:
+        for cid in applying_cycles:
+            pipe.zrangebyscore('cycles', cid, cid)
+        found = [(cid, members[0]) for cid, members in zip(applying_cycles, pipe.execute()) if members]
+    vanished = set(applying_cycles).difference([cid for cid, _ in found])
+    if vanished:
+        for seed_path in seed_paths:
+            seed_path['cycles'] = [cid for cid in seed_path['cycles'] if cid not in vanished]
+    cycle_steps = __unpack_steps([packed for _, packed in found])
+    applying_cycles = [{'cycle': int(cid), 'steps': steps} for (cid, _), steps in zip(found, cycle_steps)]
+    return [sp for i, sp in enumerate(seed_paths) if i not in filtered_seed_paths], applying_cycles
+
+
+def __reconstruct_graph():
+    """
+    Build the current graph on first use
+    :return:
+    """
+    log.info('Reconstructing path graph...')
+    __build_directed_graph(graph=pgraph)
 
 
-# Build the current graph on import
-log.info('Reconstructing path graph...')
-__build_directed_graph(graph=pgraph)
+# Graph of types and properties, built from the index on first use
+pgraph = LazyObject(nx.DiGraph, setup=__reconstruct_graph)
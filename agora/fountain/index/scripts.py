@@ -0,0 +1,66 @@
+"""
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  This file is part of the Smart Developer Hub Project:
+    http://www.smartdeveloperhub.org
+
+  Center for Open Middleware
+        http://www.centeropenmiddleware.com/
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Copyright (C) 2015 Center for Open Middleware.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this file except in compliance with the License.
+  You may obtain a copy of the License at 
+
+            http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+"""
+
+import logging
+
+from redis.exceptions import ResponseError
+
+from agora.fountain.exceptions import FountainError
+from agora.fountain.index.core import r
+
+__author__ = 'Fernando Serena'
+
+log = logging.getLogger('agora.fountain.scripts')
+
+
+def register(lua, fallback):
+    """
+    Register a server-side Lua script, so that a composite read is a single EVALSHA round trip. If the Redis
+    server cannot run scripts (or the store is not a Redis server), the pure-Python fallback is used instead.
+    :param lua: The source of the script
+    :param fallback: A function that takes the same keys and args and returns the same result
+    :return: A function of keys and args
+    """
+    state = {'script': None, 'scripting': True}
+
+    def run(keys=None, args=None):
+        keys, args = keys or [], args or []
+        if state['scripting']:
+            # Scripts are registered on first use, so that importing modules does not touch the store
+            if state['script'] is None:
+                if not hasattr(r, 'register_script'):
+                    # Embedded stores are local, so there is no round trip to save
+                    state['scripting'] = False
+                    return fallback(keys, args)
+                state['script'] = r.register_script(lua)
+            try:
+                return state['script'](keys=keys, args=args)
+            except ResponseError as e:
+                if 'unknown command' not in e.message.lower():
+                    raise FountainError(e.message)
+                log.warning('Redis cannot run scripts, falling back to client-side reads: {}'.format(e.message))
+                state['scripting'] = False
+        return fallback(keys, args)
+
+    return run
@@ -23,14 +23,20 @@
 """
 
 import base64
+from uuid import uuid4
 
 from agora.fountain.exceptions import FountainError
-from agora.fountain.index import core as index
+from agora.fountain.index import core as index, scripts
 from agora.fountain.index.core import r
 
 __author__ = 'Fernando Serena'
 
 
+# Renewed on every change of seeds (with a unique token, which survives a flush of the store), so that
+# results that depend on them can be cached
+GENERATION_KEY = 'index:seed-generation'
+
+
 class TypeNotAvailableError(FountainError):
     pass
 
@@ -52,20 +58,18 @@ def add_seed(uri, ty):
     """
     from rfc3987 import parse
     parse(uri, rule='URI')
-    type_found = False
-    type_keys = r.keys('*:types')
-    for tk in type_keys:
-        if r.sismember(tk, ty):
-            type_found = True
-            encoded_uri = base64.b64encode(uri)
-            if r.sismember('seeds:{}'.format(ty), encoded_uri):
-                raise DuplicateSeedError('{} is already registered as a seed of type {}'.format(uri, ty))
-            r.sadd('seeds:{}'.format(ty), base64.b64encode(uri))
-            break
-
-    if not type_found:
+    if not index.is_type(ty):
         raise TypeNotAvailableError("{} is not a valid type".format(ty))
 
+    encoded_uri = base64.b64encode(uri)
+    if r.sismember('seeds:{}'.format(ty), encoded_uri):
+        raise DuplicateSeedError('{} is already registered as a seed of type {}'.format(uri, ty))
+    with r.pipeline() as pipe:
+        pipe.multi()
+        pipe.sadd('seeds:{}'.format(ty), encoded_uri)
+        pipe.set(GENERATION_KEY, uuid4().hex)
+        pipe.execute()
+
     return base64.b64encode('{}|{}'.format(ty, uri))
 
 
@@ -95,7 +99,12 @@ def delete_seed(sid):
         ty, uri = base64.b64decode(sid).split('|')
         set_key = 'seeds:{}'.format(ty)
         encoded_uri = base64.b64encode(uri)
-        if not r.srem(set_key, encoded_uri):
+        with r.pipeline() as pipe:
+            pipe.multi()
+            pipe.srem(set_key, encoded_uri)
+            pipe.set(GENERATION_KEY, uuid4().hex)
+            removed, _ = pipe.execute()
+        if not removed:
             raise InvalidSeedError(sid)
     except TypeError as e:
         raise InvalidSeedError(e.message)
@@ -107,7 +116,11 @@ def delete_type_seeds(ty):
     :param ty:
     :return:
     """
-    r.delete('seeds:{}'.format(ty))
+    with r.pipeline() as pipe:
+        pipe.multi()
+        pipe.delete('seeds:{}'.format(ty))
+        pipe.set(GENERATION_KEY, uuid4().hex)
+        pipe.execute()
 
 
 def get_seeds():
@@ -130,22 +143,49 @@ def get_seeds():
     return result_dict
 
 
+def __type_seeds_fallback(keys, args):
+    """
+    Client-side version of the type seeds script
+    :param keys:
+    :param args:
+    :return:
+    """
+    if not r.exists(keys[0]):
+        if r.exists(keys[1]):
+            return ['P']
+        return None
+    return ['T'] + list(r.sunion(keys[2:]))
+
+
+# Collects the seeds of a type and all its subtypes in a single round trip, given the keys of the type record,
+# the property record and the seed sets of the type and its subtypes. The result is prefixed by 'T' for types
+# and is just ['P'] for properties (that have no seeds), or nil for unknown elements.
+__type_seeds = scripts.register("""
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    if redis.call('EXISTS', KEYS[2]) == 1 then
+        return {'P'}
+    end
+    return false
+end
+local seeds = redis.call('SUNION', unpack(KEYS, 3))
+table.insert(seeds, 1, 'T')
+return seeds
+""", __type_seeds_fallback)
+
+
 def get_type_seeds(ty):
     """
 
     :param ty:
     :return:
     """
+    # Subtypes come from the (cached) description of the type, so that the script gets all the keys it reads
     try:
-        t_dict = index.get_type(ty)
-        all_seeds = set([])
-        for t in t_dict['sub'] + [ty]:
-            all_seeds.update([base64.b64decode(seed) for seed in list(r.smembers('seeds:{}'.format(t)))])
-        return list(all_seeds)
+        sub = index.get_type(ty)['sub']
     except TypeError:
-        # Check if it is a property...and return an empty list
-        try:
-            index.get_property(ty)
-            return []
-        except TypeError:
-            raise TypeNotAvailableError(ty)
+        sub = []
+    seed_keys = ['seeds:{}'.format(t) for t in [ty] + sub]
+    result = __type_seeds(keys=['types:{}'.format(ty), 'properties:{}'.format(ty)] + seed_keys)
+    if result is None:
+        raise TypeNotAvailableError(ty)
+    return list(set([base64.b64decode(seed) for seed in result[1:]]))
@@ -0,0 +1,219 @@
+"""
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  This file is part of the Smart Developer Hub Project:
+    http://www.smartdeveloperhub.org
+
+  Center for Open Middleware
+        http://www.centeropenmiddleware.com/
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Copyright (C) 2015 Center for Open Middleware.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this file except in compliance with the License.
+  You may obtain a copy of the License at 
+
+            http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+"""
+
+import json
+import logging
+import time
+import uuid
+from datetime import datetime as dt
+from threading import Lock, Thread
+
+from concurrent.futures.thread import ThreadPoolExecutor
+from redis.exceptions import RedisError
+
+import agora.fountain.index.core as index
+from agora.fountain.exceptions import FountainError
+from agora.fountain.server import app
+
+__author__ = 'Fernando Serena'
+
+log = logging.getLogger('agora.fountain.jobs')
+
+# Ids of the known jobs, scored by creation time
+JOBS_KEY = 'jobs'
+# Time of the last heartbeat of every process that accepted jobs, by owner
+BEATS_KEY = 'jobs:beats'
+
+# Identifies the jobs accepted by this process
+OWNER = uuid.uuid4().hex
+
+# A single worker, so that analyses of the index never overlap
+worker = ThreadPoolExecutor(1)
+
+__heart = None
+__heart_lock = Lock()
+
+
+def __job_key(jid):
+    return 'jobs:{}'.format(jid)
+
+
+def __save(job):
+    """
+
+    :param job:
+    :return:
+    """
+    try:
+        index.r.set(__job_key(job['id']), json.dumps(job))
+    except RedisError as e:
+        raise FountainError(e.message)
+
+
+def __beat():
+    """
+    Record that this process is alive, so that its unfinished jobs are not taken as orphaned
+    :return:
+    """
+    index.r.hset(BEATS_KEY, OWNER, time.time())
+
+
+def __keep_beating():
+    while True:
+        time.sleep(app.config.get('JOBS_HEARTBEAT', 10))
+        try:
+            __beat()
+        except RedisError as e:
+            log.warning('Could not record the heartbeat of the jobs: {}'.format(e.message))
+
+
+def __start_heart():
+    global __heart
+    with __heart_lock:
+        if __heart is None:
+            __heart = Thread(target=__keep_beating)
+            __heart.daemon = True
+            __heart.start()
+
+
+def __reap(jobs):
+    """
+    Mark as failed the unfinished jobs whose process stopped beating (it died before finishing them)
+    :param jobs: Job records
+    :return: The records, updated
+    """
+    unfinished = [job for job in jobs if job is not None and job['status'] in ['pending', 'running']]
+    if not unfinished:
+        return jobs
+    beats = index.r.hgetall(BEATS_KEY)
+    expiry = time.time() - 3 * app.config.get('JOBS_HEARTBEAT', 10)
+    for job in unfinished:
+        if float(beats.get(job.get('owner'), 0)) < expiry:
+            log.warning('Job {} was left {} by a process that is gone'.format(job['id'], job['status']))
+            job['status'] = 'failed'
+            job['stage'] = None
+            job['error'] = 'The process running the job is gone'
+            job['finished'] = dt.utcnow().isoformat()
+            __save(job)
+    gone = [owner for owner, beat in beats.items() if float(beat) < expiry]
+    if gone:
+        index.r.hdel(BEATS_KEY, *gone)
+    return jobs
+
+
+def __prune():
+    """
+    Forget the oldest finished jobs beyond the configured history size (pending and running ones are kept,
+    unless the process that accepted them is gone)
+    :return:
+    """
+    history = app.config.get('JOBS_HISTORY', 100)
+    candidates = index.r.zrange(JOBS_KEY, 0, -history - 1)
+    if not candidates:
+        return
+    with index.r.pipeline() as pipe:
+        for jid in candidates:
+            pipe.get(__job_key(jid))
+        records = __reap([json.loads(job) if job is not None else None for job in pipe.execute()])
+    obsolete = [jid for jid, job in zip(candidates, records)
+                if job is None or job['status'] in ['done', 'failed']]
+    if obsolete:
+        with index.r.pipeline() as pipe:
+            pipe.multi()
+            pipe.delete(*[__job_key(jid) for jid in obsolete])
+            pipe.zrem(JOBS_KEY, *obsolete)
+            pipe.execute()
+
+
+def __run(job, stages):
+    """
+    Run the stages of a job in order, recording its progress as it goes
+    :param job:
+    :param stages:
+    :return:
+    """
+
+    def progress(done, total):
+        job['progress'] = {'done': done, 'total': total}
+        __save(job)
+
+    job['status'] = 'running'
+    job['started'] = dt.utcnow().isoformat()
+    try:
+        for name, stage in stages:
+            job['stage'] = name
+            job['progress'] = None
+            __save(job)
+            start = dt.now()
+            stage(progress)
+            job['stages'].append({'name': name, 'ms': (dt.now() - start).total_seconds() * 1000})
+        job['status'] = 'done'
+    except Exception as e:
+        log.error('Job {} failed at {}: {}'.format(job['id'], job['stage'], e))
+        job['status'] = 'failed'
+        job['error'] = '{}'.format(e)
+        raise
+    finally:
+        job['stage'] = None
+        job['finished'] = dt.utcnow().isoformat()
+        __save(job)
+
+
+def submit(operation, vids, stages):
+    """
+    Queue an analysis of the index for the background worker
+    :param operation: What caused the analysis (e.g. 'add')
+    :param vids: The affected vocabularies
+    :param stages: A list of (name, function of a progress callback of (done, total)) to run in order
+    :return: The job id and the future of its completion
+    """
+    job = {'id': uuid.uuid4().hex, 'operation': operation, 'vocabularies': vids, 'status': 'pending',
+           'created': dt.utcnow().isoformat(), 'started': None, 'finished': None, 'stage': None, 'progress': None,
+           'stages': [], 'error': None, 'owner': OWNER}
+    __start_heart()
+    try:
+        __beat()
+    except RedisError as e:
+        raise FountainError(e.message)
+    __save(job)
+    try:
+        index.r.zadd(JOBS_KEY, time.time(), job['id'])
+        __prune()
+    except RedisError as e:
+        raise FountainError(e.message)
+    log.info('Job {} ({} {}) queued'.format(job['id'], operation, vids))
+    return job['id'], worker.submit(__run, job, stages)
+
+
+def get_job(jid):
+    """
+
+    :param jid:
+    :return: The job record, or None if it is unknown
+    """
+    try:
+        job = index.r.get(__job_key(jid))
+        return __reap([json.loads(job)])[0] if job is not None else None
+    except RedisError as e:
+        raise FountainError(e.message)
@@ -0,0 +1,86 @@
+"""
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  This file is part of the Smart Developer Hub Project:
+    http://www.smartdeveloperhub.org
+
+  Center for Open Middleware
+        http://www.centeropenmiddleware.com/
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Copyright (C) 2015 Center for Open Middleware.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this file except in compliance with the License.
+  You may obtain a copy of the License at 
+
+            http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+"""
+
+from threading import RLock
+
+__author__ = 'Fernando Serena'
+
+
+class LazyObject(object):
+    """
+    Stands in for an object that is expensive to create (a store connection, a graph...), so that importing
+    the module that owns it has no side effects. The object is created, and set up, on first attribute access.
+    """
+
+    def __init__(self, factory, setup=None):
+        """
+
+        :param factory: A function that returns the object
+        :param setup: An optional function to run once the object is reachable through this proxy
+        """
+        self.__factory = factory
+        self.__setup = setup
+        self.__target = None
+        self.__ready = False
+        self.__lock = RLock()
+
+    def get_object(self):
+        """
+        Create the underlying object, if it was not yet
+        :return: The underlying object
+        """
+        if not self.__ready:
+            with self.__lock:
+                # The setup function may use the proxy itself
+                if self.__target is None:
+                    self.__target = self.__factory()
+                    try:
+                        if self.__setup is not None:
+                            self.__setup()
+                    except Exception:
+                        self.__target = None
+                        raise
+                    self.__ready = True
+        return self.__target
+
+    @property
+    def loaded(self):
+        return self.__ready
+
+    def __getattr__(self, name):
+        return getattr(self.get_object(), name)
+
+    # Special methods are looked up on the type, so they have to be forwarded explicitly
+
+    def __contains__(self, item):
+        return item in self.get_object()
+
+    def __iter__(self):
+        return iter(self.get_object())
+
+    def __len__(self):
+        return len(self.get_object())
+
+    def __getitem__(self, key):
+        return self.get_object()[key]
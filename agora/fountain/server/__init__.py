@@ -37,3 +37,16 @@ app.config.from_object(config)
 out = StringIO()
 pprint.pprint(dict(app.config), stream=out)
 app.logger.info("""Fountain created!\n{}""".format(out.getvalue()))
+
+
+def create_app():
+    """
+    Load the API routes on the application and start the path worker processes, if any (before the server
+    starts any thread). Otherwise, the index store, the ontology graph and the path graph are only set up once
+    they are first used.
+    :return: The application
+    """
+    from agora.fountain import api
+    from agora.fountain.index import paths
+    paths.start_workers()
+    return app
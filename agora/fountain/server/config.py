@@ -43,6 +43,26 @@ class Config(object):
         'graph': 'graph_store'
     }
     PORT = _api_port()
+    INDEX_CACHE_SIZE = 4096
+    EXTRACT_CHUNK_SIZE = 256
+    INDEX_LAYOUT = os.environ.get('FOUNTAIN_INDEX_LAYOUT', 'sets')
+    INDEX_STORE = os.environ.get('FOUNTAIN_INDEX_STORE', 'redis')
+    JOBS_HISTORY = 100
+    # Seconds between the heartbeats of a process with jobs (missing three of them makes its jobs fail)
+    JOBS_HEARTBEAT = 10
+    # Number of processes to enumerate paths with (threads are used if it is not greater than 1)
+    PATHS_PROCESSES = int(os.environ.get('FOUNTAIN_PATHS_PROCESSES', 0))
+    # Limits of path enumeration (0 for none): steps of a path and paths of an element
+    PATHS_MAX_LENGTH = int(os.environ.get('FOUNTAIN_PATHS_MAX_LENGTH', 64))
+    PATHS_MAX_PER_ELEMENT = int(os.environ.get('FOUNTAIN_PATHS_MAX_PER_ELEMENT', 10000))
+    PATHS_BATCH_SIZE = 1000
+    # Seconds after which the lock of a calculation of paths expires, in case its process died
+    PATHS_LOCK_TIMEOUT = 3600
+    # Maximum number of steps of the cycles to look for (0 for no limit)
+    CYCLES_MAX_LENGTH = int(os.environ.get('FOUNTAIN_CYCLES_MAX_LENGTH', 0))
+    # Number of results of paths to keep in-process, and whether to share them through Redis
+    PATHS_CACHE_SIZE = 1024
+    PATHS_SHARED_CACHE = os.environ.get('FOUNTAIN_PATHS_SHARED_CACHE', 'false').lower() == 'true'
 
 
 class DevelopmentConfig(Config):
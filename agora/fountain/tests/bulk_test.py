@@ -0,0 +1,64 @@
+"""
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  This file is part of the Smart Developer Hub Project:
+    http://www.smartdeveloperhub.org
+
+  Center for Open Middleware
+        http://www.centeropenmiddleware.com/
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Copyright (C) 2015 Center for Open Middleware.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this file except in compliance with the License.
+  You may obtain a copy of the License at
+
+            http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+"""
+
+__author__ = 'Fernando Serena'
+
+import json
+
+from nose.tools import *
+
+from agora.fountain.tests import FountainTest
+
+
+class BulkTest(FountainTest):
+    def get_types_bulk(self, types):
+        return json.loads(self.post('/types', json.dumps(types), content_type='application/json', exp_code=200,
+                                    message='The types could not be described').data)['types']
+
+    def get_properties_bulk(self, props):
+        return json.loads(self.post('/properties', json.dumps(props), content_type='application/json', exp_code=200,
+                                    message='The properties could not be described').data)['properties']
+
+
+class BulkTypesTest(BulkTest):
+    def test_bulk_types(self):
+        self.post_vocabulary('simple_two_concepts')
+        types = self.get_types_bulk(['test:Concept1', 'test:Concept2', 'test:Unknown'])
+        eq_(set(types.keys()), {'test:Concept1', 'test:Concept2'}, 'Only the known types must be described')
+        for ty in types:
+            eq_(types[ty], self.get_type(ty), 'The bulk description of {} does not match'.format(ty))
+
+
+class BulkPropertiesTest(BulkTest):
+    def test_bulk_properties(self):
+        self.post_vocabulary('simple_two_concepts')
+        props = self.get_properties_bulk(['test:prop21', 'test:unknown'])
+        eq_(props.keys(), ['test:prop21'], 'Only the known properties must be described')
+        eq_(props['test:prop21'], self.get_property('test:prop21'), 'The bulk description does not match')
+
+    def test_bad_request(self):
+        self.post('/properties', '"test:prop21"', content_type='application/json', exp_code=400)
+        for items in [[{"a": 1}], [["test:prop21"]], ['test:prop21', None]]:
+            self.post('/properties', json.dumps(items), content_type='application/json', exp_code=400)
+            self.post('/types', json.dumps(items), content_type='application/json', exp_code=400)
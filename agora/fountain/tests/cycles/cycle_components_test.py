@@ -0,0 +1,68 @@
+"""
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  This file is part of the Smart Developer Hub Project:
+    http://www.smartdeveloperhub.org
+
+  Center for Open Middleware
+        http://www.centeropenmiddleware.com/
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Copyright (C) 2015 Center for Open Middleware.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this file except in compliance with the License.
+  You may obtain a copy of the License at 
+
+            http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+"""
+
+import json
+
+from nose.tools import *
+
+from agora.fountain.server import app
+from agora.fountain.tests import FountainTest
+
+__author__ = 'Fernando Serena'
+
+
+def get_components(test):
+    return json.loads(test.get('/cycles'))['components']
+
+
+class CycleComponentsTest(FountainTest):
+    def test_components(self):
+        self.post_vocabulary('self_cycle')
+        self.post_vocabulary('self_cycle_2')
+        self.post_seed('test:Concept1', 'http://localhost/seed1')
+        self.post_seed('test:Concept2', 'http://localhost/seed2')
+
+        components = get_components(self)
+        eq_([c['elements'] for c in components], [['test:Concept1', 'test:prop11a'], ['test:Concept2', 'test:prop22']])
+        for component in components:
+            _, all_cycles = self.get_paths(component['elements'][0])
+            eq_(component['cycles'], [c['cycle'] for c in all_cycles], 'The component should have the self cycle')
+
+
+class CycleMaxLengthTest(FountainTest):
+    def setUp(self):
+        super(CycleMaxLengthTest, self).setUp()
+        self.max_length = app.config['CYCLES_MAX_LENGTH']
+
+    def tearDown(self):
+        app.config['CYCLES_MAX_LENGTH'] = self.max_length
+
+    def test_max_length(self):
+        app.config['CYCLES_MAX_LENGTH'] = 2
+        self.post_vocabulary('three_concept_cycle')
+        self.post_vocabulary('self_cycle_2')
+        components = get_components(self)
+        eq_(len(components), 1, 'The self cycle should join the component of the three concepts')
+        eq_(len(components[0]['elements']), 7)
+        eq_(len(components[0]['cycles']), 1, 'Only the self cycle is short enough')
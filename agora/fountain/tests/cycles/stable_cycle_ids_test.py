@@ -0,0 +1,51 @@
+"""
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  This file is part of the Smart Developer Hub Project:
+    http://www.smartdeveloperhub.org
+
+  Center for Open Middleware
+        http://www.centeropenmiddleware.com/
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Copyright (C) 2015 Center for Open Middleware.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this file except in compliance with the License.
+  You may obtain a copy of the License at
+
+            http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+"""
+
+from nose.tools import *
+
+from agora.fountain.tests import FountainTest
+
+__author__ = 'Fernando Serena'
+
+
+def cycle_ids(all_cycles):
+    return dict([(c['cycle'], [(s['type'], s['property']) for s in c['steps']]) for c in all_cycles])
+
+
+class StableCycleIdsTest(FountainTest):
+    def test_cycle_ids(self):
+        self.post_vocabulary('two_concept_cycle')
+        self.post_seed('test:Concept1', 'http://localhost/seed')
+        _, before = self.get_paths('test:Concept1')
+
+        self.post_vocabulary('self_cycle')
+        _, after = self.get_paths('test:Concept1')
+        eq_(len(after), len(before) + 1, 'The new cycle should have been found')
+        before, after = cycle_ids(before), cycle_ids(after)
+        for cid, steps in before.items():
+            eq_(after.get(cid), steps, 'Cycle {} should have kept its id'.format(cid))
+
+        self.delete_vocabulary('http://localhost/vocabs/self')
+        _, final = self.get_paths('test:Concept1')
+        eq_(cycle_ids(final), before, 'Only the cycle of the deleted vocabulary should have been removed')
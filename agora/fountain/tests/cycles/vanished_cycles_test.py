@@ -0,0 +1,46 @@
+"""
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  This file is part of the Smart Developer Hub Project:
+    http://www.smartdeveloperhub.org
+
+  Center for Open Middleware
+        http://www.centeropenmiddleware.com/
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Copyright (C) 2015 Center for Open Middleware.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this file except in compliance with the License.
+  You may obtain a copy of the License at 
+
+            http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+"""
+
+from nose.tools import *
+
+from agora.fountain.index import core, paths
+from agora.fountain.tests import FountainTest
+
+__author__ = 'Fernando Serena'
+
+
+class VanishedCyclesTest(FountainTest):
+    def test_cycle_removed_while_reading(self):
+        self.post_vocabulary('two_concept_cycle')
+        self.post_seed('test:Concept1', 'http://localhost/seed')
+        _, cycles = self.get_paths('test:Concept1')
+        eq_(len(cycles), 1, 'The cycle should have been found')
+
+        # The cycle is removed by a calculation published after the cycles of the types were read
+        core.r.zrem('cycles', *core.r.zrange('cycles', 0, -1))
+        paths.results.clear()
+        seed_paths, cycles = self.get_paths('test:Concept1')
+        eq_(cycles, [], 'A cycle that disappeared should be skipped')
+        for seed_path in seed_paths:
+            eq_(seed_path['cycles'], [], 'A cycle that disappeared should not be referred to')
@@ -0,0 +1,57 @@
+"""
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  This file is part of the Smart Developer Hub Project:
+    http://www.smartdeveloperhub.org
+
+  Center for Open Middleware
+        http://www.centeropenmiddleware.com/
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Copyright (C) 2015 Center for Open Middleware.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this file except in compliance with the License.
+  You may obtain a copy of the License at 
+
+            http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+"""
+
+from nose.tools import *
+
+from agora.fountain.index import core
+from agora.fountain.tests import FountainTest
+
+__author__ = 'Fernando Serena'
+
+
+class IndexCacheTest(FountainTest):
+    def test_modified_while_reading(self):
+        self.post_vocabulary('simple_two_concepts')
+        get_records = getattr(core, '__get_records')
+        reads = []
+
+        def racing_records(kind, terms):
+            records = get_records(kind, terms)
+            if terms:
+                reads.append(kind)
+            if len(reads) == 1:
+                # The index is modified by another thread right after it was read
+                getattr(core, '__bump_generation')()
+            return records
+
+        setattr(core, '__get_records', racing_records)
+        core.cache.clear()
+        try:
+            core.get_types_bulk(['test:Concept1'])
+            core.get_types_bulk(['test:Concept1'])
+            eq_(len(reads), 2, 'What was read before the modification should not be cached for later')
+            core.get_types_bulk(['test:Concept1'])
+            eq_(len(reads), 2, 'What was read after the modification should be cached')
+        finally:
+            setattr(core, '__get_records', get_records)
@@ -0,0 +1,107 @@
+"""
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  This file is part of the Smart Developer Hub Project:
+    http://www.smartdeveloperhub.org
+
+  Center for Open Middleware
+        http://www.centeropenmiddleware.com/
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Copyright (C) 2015 Center for Open Middleware.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this file except in compliance with the License.
+  You may obtain a copy of the License at
+
+            http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+"""
+
+__author__ = 'Fernando Serena'
+
+import json
+import time
+from threading import Event
+
+from nose.tools import *
+
+from agora.fountain import jobs
+from agora.fountain.server import app
+from agora.fountain.tests import FountainTest
+
+
+class AsyncVocabularyTest(FountainTest):
+    def wait_job(self, location):
+        for _ in range(100):
+            job = json.loads(self.get(location))
+            if job['status'] in ['done', 'failed']:
+                return job
+            time.sleep(0.1)
+        raise AssertionError('The job did not finish')
+
+    def test_async_add(self):
+        with open('agora/fountain/tests/vocabs/simple_two_concepts.ttl') as f:
+            rv = self.app.post('/vocabs', data=f.read(),
+                               headers={'Content-Type': 'text/turtle', 'Prefer': 'respond-async'})
+        eq_(rv.status_code, 202, 'The analysis should have been accepted')
+        job = self.wait_job(rv.headers['Location'])
+        eq_(job['status'], 'done', 'The analysis failed: {}'.format(job['error']))
+        eq_(job['vocabularies'], ['stwoc'])
+        eq_([s['name'] for s in job['stages']], ['extract:stwoc', 'paths'])
+        eq_(set(self.types), {'test:Concept1', 'test:Concept2'}, 'The vocabulary was not analysed')
+
+    def test_unknown_job(self):
+        self.get('/jobs/unknown', exp_code=404)
+
+
+class JobHistoryTest(FountainTest):
+    def test_unfinished_jobs_are_kept(self):
+        history = app.config['JOBS_HISTORY']
+        app.config['JOBS_HISTORY'] = 1
+        release = Event()
+        try:
+            running, _ = jobs.submit('add', [], [('wait', lambda progress: release.wait(10))])
+            pending, _ = jobs.submit('add', [], [])
+            jobs.submit('add', [], [])
+            assert jobs.get_job(running) is not None, 'A running job should not be forgotten'
+            assert jobs.get_job(pending) is not None, 'A pending job should not be forgotten'
+        finally:
+            release.set()
+            app.config['JOBS_HISTORY'] = history
+
+        app.config['JOBS_HISTORY'] = 1
+        try:
+            _, future = jobs.submit('add', [], [])
+            future.result(10)
+            jobs.submit('add', [], [])
+        finally:
+            app.config['JOBS_HISTORY'] = history
+        eq_(jobs.get_job(running), None, 'Finished jobs beyond the history should be forgotten')
+        eq_(jobs.get_job(pending), None, 'Finished jobs beyond the history should be forgotten')
+
+
+class OrphanedJobTest(FountainTest):
+    def test_orphaned_jobs_fail(self):
+        jid = 'orphaned'
+        job = {'id': jid, 'operation': 'add', 'vocabularies': [], 'status': 'running', 'created': None,
+               'started': None, 'finished': None, 'stage': 'paths', 'progress': None, 'stages': [], 'error': None,
+               'owner': 'gone'}
+        jobs.index.r.set('jobs:{}'.format(jid), json.dumps(job))
+        jobs.index.r.zadd(jobs.JOBS_KEY, 0, jid)
+
+        job = json.loads(self.get('/jobs/{}'.format(jid)))
+        eq_(job['status'], 'failed', 'A job whose process is gone should have failed')
+        eq_(job['stage'], None)
+
+        history = app.config['JOBS_HISTORY']
+        app.config['JOBS_HISTORY'] = 1
+        try:
+            jobs.submit('add', [], [])
+        finally:
+            app.config['JOBS_HISTORY'] = history
+        eq_(jobs.get_job(jid), None, 'Orphaned jobs beyond the history should be forgotten')
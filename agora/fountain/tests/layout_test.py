@@ -0,0 +1,130 @@
+"""
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  This file is part of the Smart Developer Hub Project:
+    http://www.smartdeveloperhub.org
+
+  Center for Open Middleware
+        http://www.centeropenmiddleware.com/
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Copyright (C) 2015 Center for Open Middleware.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this file except in compliance with the License.
+  You may obtain a copy of the License at 
+
+            http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+"""
+
+import runpy
+import sys
+from StringIO import StringIO
+
+from nose.tools import *
+
+from agora.fountain.exceptions import FountainError
+from agora.fountain.index import core
+from agora.fountain.server import app
+from agora.fountain.tests import FountainTest
+
+__author__ = 'Fernando Serena'
+
+
+class LayoutTest(FountainTest):
+    # Migrations are tested from the sets layout, whatever the configured one is, which is restored afterwards
+    def setUp(self):
+        super(LayoutTest, self).setUp()
+        core.migrate_layout('sets')
+
+    def tearDown(self):
+        core.r.delete(core.MIGRATION_KEY, core.MIGRATED_KEY)
+        core.migrate_layout(app.config.get('INDEX_LAYOUT', 'sets'))
+
+    def describe(self):
+        types = dict([(t, self.get_type(t)) for t in self.types])
+        props = dict([(p, self.get_property(p)) for p in self.properties])
+        return types, props
+
+    def records_exist(self):
+        return [core.r.exists(getattr(core, '__records_key')(vid, 'types')) for vid in core.r.smembers(core.VOCABS_KEY)]
+
+
+class CompactLayoutTest(LayoutTest):
+    def test_compact_layout(self):
+        self.post_vocabulary('simple_two_concepts')
+        self.post_vocabulary('one_subclass')
+        described = self.describe()
+
+        eq_(core.migrate_layout('compact'), 5, 'All term records should be migrated')
+        eq_(core.r.get(core.LAYOUT_KEY), 'compact', 'The index should be in the compact layout')
+        assert all(self.records_exist()), 'Term records should be packed into one hash per vocabulary'
+        eq_(self.describe(), described, 'The layout should not change the description of any term')
+        eq_(core.migrate_layout('compact'), 0, 'There should be nothing to migrate')
+
+        core.migrate_layout('sets')
+        assert not any(self.records_exist()), 'Term records should be kept in sets again'
+        eq_(self.describe(), described, 'The layout should not change the description of any term')
+
+
+class ResumedMigrationTest(LayoutTest):
+    def test_resume_after_crash(self):
+        self.post_vocabulary('simple_two_concepts')
+        self.post_vocabulary('one_subclass')
+        described = self.describe()
+
+        read_facets = getattr(core, '__read_facets')
+        vocabs = set([])
+
+        def crashing_read(kind, vid_terms, facets, _layout=None):
+            vocabs.update([vid for vid, _ in vid_terms])
+            if len(vocabs) > 1:
+                raise RuntimeError('The migration process died')
+            return read_facets(kind, vid_terms, facets, _layout=_layout)
+
+        setattr(core, '__read_facets', crashing_read)
+        try:
+            assert_raises(RuntimeError, core.migrate_layout, 'compact')
+        finally:
+            setattr(core, '__read_facets', read_facets)
+
+        eq_(core.r.get(core.LAYOUT_KEY), 'sets', 'The layout should not change until the migration finishes')
+        done = core.r.smembers(core.MIGRATED_KEY)
+        eq_(len(done), 1, 'The progress of the migration should be recorded')
+        assert_raises(FountainError, core.migrate_layout, 'sets')
+
+        pending = core.r.smembers(core.VOCABS_KEY).difference(done).pop()
+        pending_records = len(core.r.smembers('vocabs:{}:types'.format(pending))) + len(
+            core.r.smembers('vocabs:{}:properties'.format(pending)))
+        eq_(core.migrate_layout('compact'), pending_records, 'The migration should resume where it stopped')
+        eq_(core.r.get(core.LAYOUT_KEY), 'compact', 'The index should be in the compact layout')
+        assert not core.r.exists(core.MIGRATED_KEY), 'The progress of a finished migration should be dropped'
+        assert all(self.records_exist()), 'Term records should be packed into one hash per vocabulary'
+        eq_(self.describe(), described, 'The layout should not change the description of any term')
+
+
+class MigrateCommandTest(LayoutTest):
+    def run_command(self, *args):
+        argv, stdout = sys.argv, sys.stdout
+        sys.argv, sys.stdout = ['migrate'] + list(args), StringIO()
+        try:
+            runpy.run_module('agora.fountain.index.migrate', run_name='__main__')
+            return sys.stdout.getvalue()
+        finally:
+            sys.argv, sys.stdout = argv, stdout
+
+    def test_migrate_command(self):
+        self.post_vocabulary('simple_two_concepts')
+        described = self.describe()
+
+        with assert_raises(SystemExit):
+            self.run_command('unknown')
+        eq_(self.run_command('compact').strip(), '3 term records migrated to the compact layout')
+        eq_(core.r.get(core.LAYOUT_KEY), 'compact', 'The index should be in the compact layout')
+        eq_(self.describe(), described, 'The layout should not change the description of any term')
+        eq_(self.run_command('sets').strip(), '3 term records migrated to the sets layout')
@@ -0,0 +1,102 @@
+"""
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  This file is part of the Smart Developer Hub Project:
+    http://www.smartdeveloperhub.org
+
+  Center for Open Middleware
+        http://www.centeropenmiddleware.com/
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Copyright (C) 2015 Center for Open Middleware.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this file except in compliance with the License.
+  You may obtain a copy of the License at 
+
+            http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+"""
+
+import unittest
+from threading import Thread
+
+from nose.tools import *
+from redis.exceptions import ResponseError
+
+from agora.fountain.index.memory import MemoryStore
+
+__author__ = 'Fernando Serena'
+
+
+class MemoryStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.r = MemoryStore()
+
+    def test_wrong_type(self):
+        self.r.sadd('types:a', 'x')
+        self.r.hset('types:b', 'sub', '[]')
+        self.r.zadd('cycles', 1, 'x')
+        assert_raises(ResponseError, self.r.get, 'types:a')
+        assert_raises(ResponseError, self.r.hget, 'types:a', 'sub')
+        assert_raises(ResponseError, self.r.smembers, 'types:b')
+        assert_raises(ResponseError, self.r.zrange, 'types:b', 0, -1)
+        assert_raises(ResponseError, self.r.hgetall, 'cycles')
+        eq_(self.r.smembers('types:a'), set(['x']), 'A failed command should not modify the key')
+
+    def test_empty_containers_are_pruned(self):
+        self.r.sadd('types:a', 'x')
+        self.r.hset('types:b', 'sub', '[]')
+        self.r.zadd('paths:c', 1, 'x')
+        self.r.srem('types:a', 'x')
+        self.r.hdel('types:b', 'sub')
+        self.r.zrem('paths:c', 'x')
+        for key in ['types:a', 'types:b', 'paths:c']:
+            assert not self.r.exists(key), '{} should be dropped once empty'.format(key)
+        eq_(self.r.keys('types:*'), [], 'Dropped keys should not be found by prefix')
+        self.r.set('types:a', 'value')
+        eq_(self.r.get('types:a'), 'value', 'A dropped key should be reusable with another type')
+
+    def test_zrange_bounds(self):
+        self.r.zadd('paths:a', 2, 'b', 1, 'a', 3, 'c')
+        eq_(self.r.zrange('paths:a', 0, -1), ['a', 'b', 'c'])
+        eq_(self.r.zrange('paths:a', 1, 1), ['b'])
+        eq_(self.r.zrange('paths:a', -2, -1), ['b', 'c'])
+        eq_(self.r.zrange('paths:a', -10, 10), ['a', 'b', 'c'])
+        eq_(self.r.zrange('paths:a', 2, 1), [])
+        eq_(self.r.zrange('paths:a', 5, 10), [])
+        eq_(self.r.zrange('paths:a', 0, 0, withscores=True), [('a', 1.0)])
+        eq_(self.r.zrange('paths:none', 0, -1), [])
+        eq_(self.r.zrangebyscore('paths:a', 2, 3), ['b', 'c'])
+
+    def test_pipelines_are_atomic(self):
+        with self.r.pipeline() as pipe:
+            pipe.multi()
+            pipe.set('index:a', 1)
+            pipe.sadd('index:a', 'x')
+            pipe.set('index:b', 1)
+            eq_(self.r.get('index:a'), None, 'Commands should be buffered until the pipeline is executed')
+            assert_raises(ResponseError, pipe.execute)
+        eq_(self.r.get('index:b'), '1', 'A failed command should not abort the rest, as in Redis')
+
+        def write():
+            for _ in range(500):
+                with self.r.pipeline() as pipe:
+                    pipe.incr('index:a')
+                    pipe.incr('index:b')
+                    pipe.execute()
+
+        self.r.set('index:a', 0)
+        self.r.set('index:b', 0)
+        writer = Thread(target=write)
+        writer.start()
+        while writer.is_alive():
+            with self.r.pipeline() as pipe:
+                a, b = pipe.get('index:a').get('index:b').execute()
+            eq_(a, b, 'A pipeline should never be seen half executed')
+        writer.join()
+        eq_(self.r.get('index:a'), '500')
@@ -0,0 +1,70 @@
+"""
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  This file is part of the Smart Developer Hub Project:
+    http://www.smartdeveloperhub.org
+
+  Center for Open Middleware
+        http://www.centeropenmiddleware.com/
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Copyright (C) 2015 Center for Open Middleware.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this file except in compliance with the License.
+  You may obtain a copy of the License at 
+
+            http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+"""
+
+from nose.tools import *
+
+from agora.fountain.index import core
+from agora.fountain.index.paths import RESULTS_KEY, results
+from agora.fountain.server import app
+from agora.fountain.tests import FountainTest
+
+__author__ = 'Fernando Serena'
+
+
+def path_seeds(paths):
+    return sorted(set([seed for path in paths for seed in path['seeds']]))
+
+
+class PathCacheTest(FountainTest):
+    def test_cache(self):
+        self.post_vocabulary('simple_two_concepts')
+        self.post_seed('test:Concept2', 'http://localhost/seed1')
+        paths, _ = self.get_paths('test:Concept1')
+        eq_(path_seeds(paths), ['http://localhost/seed1'])
+        eq_(self.get_paths('test:Concept1')[0], paths, 'The same paths should be returned again')
+
+        seed_uri = self.post_seed('test:Concept2', 'http://localhost/seed2')
+        paths, _ = self.get_paths('test:Concept1')
+        eq_(path_seeds(paths), ['http://localhost/seed1', 'http://localhost/seed2'], 'The new seed is missing')
+
+        self.delete_seed(seed_uri)
+        paths, _ = self.get_paths('test:Concept1')
+        eq_(path_seeds(paths), ['http://localhost/seed1'], 'The deleted seed should not be there')
+
+
+class SharedPathCacheTest(PathCacheTest):
+    def setUp(self):
+        super(SharedPathCacheTest, self).setUp()
+        self.shared = app.config['PATHS_SHARED_CACHE']
+        app.config['PATHS_SHARED_CACHE'] = True
+
+    def tearDown(self):
+        app.config['PATHS_SHARED_CACHE'] = self.shared
+
+    def get_paths(self, node):
+        # Results are dropped in-process, so that they can only come from the shared cache
+        results.clear()
+        result = super(SharedPathCacheTest, self).get_paths(node)
+        assert core.r.hget(RESULTS_KEY, node) is not None, 'The result should have been shared'
+        return result
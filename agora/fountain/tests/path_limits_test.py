@@ -0,0 +1,70 @@
+"""
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  This file is part of the Smart Developer Hub Project:
+    http://www.smartdeveloperhub.org
+
+  Center for Open Middleware
+        http://www.centeropenmiddleware.com/
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Copyright (C) 2015 Center for Open Middleware.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this file except in compliance with the License.
+  You may obtain a copy of the License at 
+
+            http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+"""
+
+import json
+
+from nose.tools import *
+
+from agora.fountain.server import app
+from agora.fountain.tests import FountainTest
+
+__author__ = 'Fernando Serena'
+
+
+class PathLimitsTest(FountainTest):
+    def setUp(self):
+        super(PathLimitsTest, self).setUp()
+        self.max_length = app.config['PATHS_MAX_LENGTH']
+
+    def tearDown(self):
+        app.config['PATHS_MAX_LENGTH'] = self.max_length
+
+    def test_limits(self):
+        self.post_vocabulary('three_concept_cycle')
+        self.post_seed('test:Concept1', 'http://localhost/seed')
+        response = json.loads(self.get('/paths/test:Concept3'))
+        eq_(response['limits']['max-length'], self.max_length)
+        assert not response['limits']['truncated'], 'No path should exceed the limits'
+        eq_(max([len(p['steps']) for p in response['paths']]), 2)
+
+        app.config['PATHS_MAX_LENGTH'] = 1
+        self.post_vocabulary('self_cycle')
+        response = json.loads(self.get('/paths/test:Concept2'))
+        eq_(response['limits']['max-length'], 1)
+        assert response['limits']['truncated'], 'The paths should have been cut'
+        eq_(max([len(p['steps']) for p in response['paths']]), 1)
+
+
+class ExactLengthTest(FountainTest):
+    def test_exact_length(self):
+        max_length = app.config['PATHS_MAX_LENGTH']
+        app.config['PATHS_MAX_LENGTH'] = 1
+        try:
+            self.post_vocabulary('simple_two_concepts')
+            self.post_seed('test:Concept2', 'http://localhost/seed')
+            response = json.loads(self.get('/paths/test:Concept1'))
+        finally:
+            app.config['PATHS_MAX_LENGTH'] = max_length
+        eq_(max([len(p['steps']) for p in response['paths']]), 1)
+        assert not response['limits']['truncated'], 'A path of the maximum length that goes no further is whole'
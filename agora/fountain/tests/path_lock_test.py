@@ -0,0 +1,95 @@
+"""
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  This file is part of the Smart Developer Hub Project:
+    http://www.smartdeveloperhub.org
+
+  Center for Open Middleware
+        http://www.centeropenmiddleware.com/
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Copyright (C) 2015 Center for Open Middleware.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this file except in compliance with the License.
+  You may obtain a copy of the License at 
+
+            http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+"""
+
+import time
+from threading import Thread
+
+from nose.tools import *
+
+from agora.fountain.exceptions import FountainError
+from agora.fountain.index import core, paths
+from agora.fountain.server import app
+from agora.fountain.tests import FountainTest
+
+__author__ = 'Fernando Serena'
+
+
+class PathsLockTest(FountainTest):
+    def test_lock(self):
+        self.post_vocabulary('simple_two_concepts')
+        calculation = Thread(target=paths.calculate_paths)
+        with paths.PathsLock(1) as lock:
+            calculation.start()
+            time.sleep(0.6)
+            lock.keep()
+            time.sleep(0.6)
+            assert calculation.is_alive(), 'Calculations of paths should wait for the lock'
+            assert not core.r.lock(paths.LOCK_KEY, timeout=1).acquire(blocking=False), \
+                'A lock that is kept should not expire'
+            if app.config['INDEX_STORE'] != 'memory':
+                core.r.delete(paths.LOCK_KEY)
+                assert_raises(FountainError, lock.keep, True)
+        calculation.join(10)
+        assert not calculation.is_alive(), 'The calculation should run once the lock is released'
+
+
+class OrphanCleanupTest(FountainTest):
+    def test_orphans(self):
+        self.post_vocabulary('simple_two_concepts')
+        orphan = '{}dead:paths:test:Concept1'.format(paths.STAGING_PREFIX)
+        core.r.zadd(orphan, 0, 'path')
+        paths.calculate_paths()
+        eq_(core.r.keys('{}*'.format(paths.STAGING_PREFIX)), [], 'No staged keys should be left')
+
+
+class AtomicPublishTest(FountainTest):
+    def test_publish(self):
+        self.post_vocabulary('simple_two_concepts')
+        self.post_seed('test:Concept2', 'http://localhost/seed')
+        expected = self.get_paths('test:Concept1')
+        generation = core.r.get(paths.GENERATION_KEY)
+
+        store_paths = getattr(paths, '__store_paths')
+
+        def lost_paths(key, packed):
+            n = store_paths(key, packed)
+            eq_(core.r.get(paths.GENERATION_KEY), generation, 'Nothing should be published while staging')
+            # The staged paths are deleted (e.g. by another calculation) before they are published
+            core.r.delete(key)
+            return n
+
+        # Every path is calculated again
+        core.r.delete(paths.GRAPH_KEY)
+        setattr(paths, '__store_paths', lost_paths)
+        try:
+            assert_raises(FountainError, paths.calculate_paths)
+        finally:
+            setattr(paths, '__store_paths', store_paths)
+        eq_(core.r.get(paths.GENERATION_KEY), generation, 'Nothing should have been published')
+        paths.results.clear()
+        eq_(self.get_paths('test:Concept1'), expected, 'The previous paths should still be there')
+
+        paths.calculate_paths()
+        assert core.r.get(paths.GENERATION_KEY) != generation, 'The new paths should have been published'
+        eq_(self.get_paths('test:Concept1'), expected)
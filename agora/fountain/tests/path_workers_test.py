@@ -0,0 +1,115 @@
+"""
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  This file is part of the Smart Developer Hub Project:
+    http://www.smartdeveloperhub.org
+
+  Center for Open Middleware
+        http://www.centeropenmiddleware.com/
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Copyright (C) 2015 Center for Open Middleware.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this file except in compliance with the License.
+  You may obtain a copy of the License at 
+
+            http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+"""
+
+import os
+import time
+
+from nose.plugins.skip import SkipTest
+from nose.tools import *
+
+from agora.fountain.exceptions import FountainError
+from agora.fountain.index import core, paths
+from agora.fountain.server import app
+from agora.fountain.tests import FountainTest
+
+__author__ = 'Fernando Serena'
+
+
+class PathWorkersTest(FountainTest):
+    def get_paths(self, node):
+        # Cycles are renumbered when every path is calculated again, so they are referred to by their steps
+        seed_paths, cycles = super(PathWorkersTest, self).get_paths(node)
+        cycle_steps = dict([(c['cycle'], tuple([(s['type'], s['property']) for s in c['steps']])) for c in cycles])
+        for seed_path in seed_paths:
+            seed_path['cycles'] = sorted([cycle_steps[cid] for cid in seed_path['cycles']])
+        return seed_paths, sorted(cycle_steps.values())
+
+    def test_process_mode(self):
+        self.post_vocabulary('three_concept_cycle')
+        self.post_vocabulary('simple_two_concepts')
+        self.post_seed('test:Concept1', 'http://localhost/seed')
+        elements = ['test:Concept1', 'test:Concept2', 'test:Concept3', 'test:prop12', 'test:prop21']
+        expected = dict([(e, self.get_paths(e)) for e in elements])
+
+        processes = app.config['PATHS_PROCESSES']
+        app.config['PATHS_PROCESSES'] = 2
+        buckets = []
+        try:
+            paths.start_workers()
+            if paths.workers is not None:
+                imap = paths.workers.imap_unordered
+
+                def counting_imap(func, tasks):
+                    buckets.extend(tasks)
+                    return imap(func, tasks)
+
+                paths.workers.imap_unordered = counting_imap
+            # Every path is calculated again
+            core.r.delete(paths.GRAPH_KEY)
+            paths.calculate_paths()
+        finally:
+            paths.stop_workers()
+            app.config['PATHS_PROCESSES'] = processes
+
+        if app.config['INDEX_STORE'] != 'memory':
+            assert buckets, 'Paths should have been calculated by worker processes'
+        paths.results.clear()
+        for e in elements:
+            eq_(self.get_paths(e), expected[e], 'The paths of {} should not depend on the workers'.format(e))
+
+
+def dying_bucket(task):
+    os._exit(1)
+
+
+# Workers look the function of their tasks up by name, in the module they were forked with
+dying_bucket.__name__ = '__calculate_bucket'
+dying_bucket.__module__ = paths.__name__
+
+
+class WorkerDeathTest(FountainTest):
+    def test_dead_worker(self):
+        if app.config['INDEX_STORE'] == 'memory':
+            raise SkipTest('Path worker processes are not used with the in-memory store')
+        self.post_vocabulary('three_concept_cycle')
+
+        calculate_bucket = getattr(paths, '__calculate_bucket')
+        processes = app.config['PATHS_PROCESSES']
+        app.config['PATHS_PROCESSES'] = 2
+        setattr(paths, '__calculate_bucket', dying_bucket)
+        try:
+            paths.start_workers()
+            core.r.delete(paths.GRAPH_KEY)
+            start = time.time()
+            assert_raises(FountainError, paths.calculate_paths)
+        finally:
+            paths.stop_workers()
+            setattr(paths, '__calculate_bucket', calculate_bucket)
+            app.config['PATHS_PROCESSES'] = processes
+
+        assert time.time() - start < 10, 'The calculation should fail as soon as a worker dies'
+        eq_(core.r.keys('{}*'.format(paths.STAGING_PREFIX)), [], 'No staged keys should be left')
+        lock = core.r.lock(paths.LOCK_KEY, timeout=1)
+        assert lock.acquire(blocking=False), 'The lock should have been released'
+        lock.release()
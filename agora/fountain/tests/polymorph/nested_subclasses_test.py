@@ -0,0 +1,82 @@
+"""
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  This file is part of the Smart Developer Hub Project:
+    http://www.smartdeveloperhub.org
+
+  Center for Open Middleware
+        http://www.centeropenmiddleware.com/
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Copyright (C) 2015 Center for Open Middleware.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this file except in compliance with the License.
+  You may obtain a copy of the License at 
+
+            http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+"""
+
+from nose.tools import *
+
+from agora.fountain.index import core, paths
+from agora.fountain.server import app
+from agora.fountain.tests import FountainTest
+
+__author__ = 'Fernando Serena'
+
+# Paths of Concept1 and its nested subtypes, which include those of their own subtypes
+ALL_STEPS = {(('test:prop21', 'test:Concept2'),), (('test:prop31', 'test:Concept3'),),
+             (('test:prop41', 'test:Concept4'),)}
+
+
+class NestedSubclassesTest(FountainTest):
+    def post_seeds(self):
+        self.post_vocabulary('nested_subclasses')
+        for ty in ['test:Concept2', 'test:Concept3', 'test:Concept4']:
+            self.post_seed(ty, 'http://localhost/{}'.format(ty.split(':')[1].lower()))
+
+    def path_steps(self, ty):
+        paths, _ = self.get_paths(ty)
+        return [tuple([(s['property'], s['type']) for s in p['steps']]) for p in paths]
+
+    def test_nested_paths(self):
+        self.post_seeds()
+        for ty in ['test:Concept1', 'test:SubConcept1', 'test:SubSubConcept1']:
+            steps = self.path_steps(ty)
+            eq_(len(steps), len(set(steps)), 'Paths shared by subtypes should only be returned once')
+            eq_(set(steps), ALL_STEPS, 'The paths of {} should include those of its subtypes'.format(ty))
+
+
+class NestedSubclassesLimitTest(NestedSubclassesTest):
+    def test_nested_paths(self):
+        # The limit counts every distinct path only once
+        max_paths = app.config['PATHS_MAX_PER_ELEMENT']
+        app.config['PATHS_MAX_PER_ELEMENT'] = 3
+        try:
+            self.post_seeds()
+            steps = self.path_steps('test:Concept1')
+        finally:
+            app.config['PATHS_MAX_PER_ELEMENT'] = max_paths
+        eq_(set(steps), ALL_STEPS, 'The limit should apply to distinct paths')
+
+
+class NestedSubclassesDeletedTest(NestedSubclassesTest):
+    def test_nested_paths(self):
+        max_paths = app.config['PATHS_MAX_PER_ELEMENT']
+        app.config['PATHS_MAX_PER_ELEMENT'] = 2
+        try:
+            self.post_seeds()
+            assert core.r.hgetall(paths.REFS_KEY), 'Types should refer to the paths of their subtypes'
+            assert core.r.smembers(paths.TRUNCATED_KEY), 'The paths of some types should have been truncated'
+            for uri in self.get_vocabularies().values():
+                self.delete_vocabulary(uri)
+        finally:
+            app.config['PATHS_MAX_PER_ELEMENT'] = max_paths
+        eq_(core.r.hgetall(paths.REFS_KEY), {}, 'The references of removed types should be gone')
+        eq_(core.r.smembers(paths.TRUNCATED_KEY), set([]), 'Removed elements should not be truncated')
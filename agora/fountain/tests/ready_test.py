@@ -0,0 +1,64 @@
+"""
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  This file is part of the Smart Developer Hub Project:
+    http://www.smartdeveloperhub.org
+
+  Center for Open Middleware
+        http://www.centeropenmiddleware.com/
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Copyright (C) 2015 Center for Open Middleware.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+  Licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this file except in compliance with the License.
+  You may obtain a copy of the License at 
+
+            http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+#-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=#
+"""
+
+import json
+
+import redis
+from nose.plugins.skip import SkipTest
+from nose.tools import *
+from redis.exceptions import BusyLoadingError
+
+from agora.fountain.exceptions import FountainError
+from agora.fountain.index import core
+from agora.fountain.lazy import LazyObject
+from agora.fountain.server import app
+from agora.fountain.tests import FountainTest
+
+__author__ = 'Fernando Serena'
+
+
+class LoadingStoreTest(FountainTest):
+    def test_loading_store_is_not_ready(self):
+        if app.config['INDEX_STORE'] == 'memory':
+            raise SkipTest('The embedded store is never loading')
+
+        def loading_ping(client):
+            raise BusyLoadingError('Redis is loading the dataset in memory')
+
+        ping = redis.StrictRedis.ping
+        store = core.r
+        core.r = LazyObject(getattr(core, '__connect'))
+        redis.StrictRedis.ping = loading_ping
+        try:
+            assert_raises(FountainError, core.r.get_object)
+            rv = self.app.get('/ready')
+            eq_(rv.status_code, 503, 'The index should not be ready while Redis is loading')
+            eq_(json.loads(rv.data)['ready'], False)
+        finally:
+            redis.StrictRedis.ping = ping
+
+        try:
+            eq_(json.loads(self.get('/ready'))['ready'], True, 'The connection should be tried again')
+        finally:
+            core.r = store
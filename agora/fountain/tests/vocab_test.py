@@ -49,3 +49,21 @@ class CreateAndDeleteSingleVocabTest(FountainTest):
         eq_(len(vocabs), False, 'Fountain should be empty again')
         eq_(len(self.types), False, 'There should not be any type available')
         eq_(len(self.properties), False, 'There should not be any property available')
+
+
+class InverseVocabTest(FountainTest):
+    def test_inverse_deleted(self):
+        self.post_vocabulary('inverse_base')
+        self.post_vocabulary('inverse_of')
+        prop = self.get_property('inva:p')
+        eq_(set(prop['domain']), {'inva:X', 'invb:W'}, 'The domain should include the range of the inverse')
+        eq_(set(prop['range']), {'inva:Y', 'invb:Z'}, 'The range should include the domain of the inverse')
+
+        self.delete_vocabulary('/vocabs/invb')
+        prop = self.get_property('inva:p')
+        eq_(prop['domain'], ['inva:X'], 'The range of a deleted inverse should not be in the domain')
+        eq_(prop['range'], ['inva:Y'], 'The domain of a deleted inverse should not be in the range')
+
+        self.post_vocabulary('inverse_base')
+        prop = self.get_property('inva:p')
+        eq_(set(prop['domain']), {'inva:X', 'invb:W'}, 'The domain should include the range of the inverse')
@@ -40,6 +40,11 @@ def view_graph():
     types, nodes, edges, roots = [], [], [], []
 
     ibase = 0
+    t_dicts = index.get_types_bulk([nid for (nid, data) in pgraph.nodes(data=True) if data.get('ty') != 'prop'])
+
+    def get_supertypes(t):
+        return set(t_dicts.get(t, {}).get('super', []))
+
     nodes_dict = dict([(nid, base64.b16encode(nid)) for nid in pgraph.nodes()])
     for (nid, data) in pgraph.nodes(data=True):
         if data.get('ty') == 'type':
@@ -55,8 +60,8 @@ def view_graph():
         elif data.get('ty') == 'prop' and data.get('object'):
             dom = [t for (t, _) in pgraph.in_edges(nid)]
             ran = [t for (_, t) in pgraph.out_edges(nid)]
-            dom = [d for d in dom if not set.intersection(set(index.get_type(d).get('super')), set(dom))]
-            ran = [r for r in ran if not set.intersection(set(index.get_type(r).get('super')), set(ran))]
+            dom = [d for d in dom if not set.intersection(get_supertypes(d), set(dom))]
+            ran = [r for r in ran if not set.intersection(get_supertypes(r), set(ran))]
 
             op_edges = list(itertools.product(*[dom, ran]))
             edges.extend([{'data': {'id': 'e{}'.format(ibase + i), 'source': nodes_dict[s], 'label': nid + '\n\a',
@@ -68,7 +73,7 @@ def view_graph():
                 print nid
             if len(ran):
                 dom = [t for (t, _) in pgraph.in_edges(nid)]
-                dom = [d for d in dom if not set.intersection(set(index.get_type(d).get('super')), set(dom))]
+                dom = [d for d in dom if not set.intersection(get_supertypes(d), set(dom))]
                 dp_edges = list(itertools.product(*[dom, ran]))
 
                 for i, (s, t) in enumerate(dp_edges):
@@ -80,8 +85,8 @@ def view_graph():
                 ibase += len(dp_edges) + 1
 
     for t in types:
-        super_types = index.get_type(t).get('super')
-        super_types = [s for s in super_types if not set.intersection(set(index.get_type(s).get('sub')),
+        super_types = t_dicts.get(t, {}).get('super', [])
+        super_types = [s for s in super_types if not set.intersection(set(t_dicts.get(s, {}).get('sub', [])),
                                                                       set(super_types))]
         st_edges = [{'data': {'id': 'e{}'.format(ibase + i), 'source': nodes_dict[st], 'label': '',
                               'target': nodes_dict[t]}, 'classes': 'subclass'}
@@ -88,10 +88,11 @@ def add_vocabulary(owl):
     """
     vid, uri, owl_g, imports = __load_owl(owl)
 
-    if vid in sch.contexts():
-        raise DuplicateVocabulary('Vocabulary already contained')
+    with sch.graph_lock:
+        if vid in sch.contexts():
+            raise DuplicateVocabulary('Vocabulary already contained')
 
-    sch.add_context(vid, owl_g)
+        sch.add_context(vid, owl_g)
     vids = [vid]
 
     # TODO: Import referenced ontologies
@@ -131,10 +132,11 @@ def update_vocabulary(vid, owl):
     if vid != owl_vid:
         raise Exception("Identifiers don't match")
 
-    if vid not in sch.contexts():
-        raise UnknownVocabulary('Vocabulary id is not known')
+    with sch.graph_lock:
+        if vid not in sch.contexts():
+            raise UnknownVocabulary('Vocabulary id is not known')
 
-    sch.update_context(vid, owl_g)
+        sch.update_context(vid, owl_g)
 
 
 def delete_vocabulary(vid):
@@ -143,10 +145,11 @@ def delete_vocabulary(vid):
     :param vid:
     :return:
     """
-    if vid not in sch.contexts():
-        raise UnknownVocabulary('Vocabulary id is not known')
+    with sch.graph_lock:
+        if vid not in sch.contexts():
+            raise UnknownVocabulary('Vocabulary id is not known')
 
-    sch.remove_context(vid)
+        sch.remove_context(vid)
 
 
 def get_vocabularies():
@@ -154,7 +157,8 @@ def get_vocabularies():
 
     :return:
     """
-    return sch.contexts()
+    with sch.graph_lock:
+        return sch.contexts()
 
 
 def get_vocabulary(vid):
@@ -163,4 +167,5 @@ def get_vocabulary(vid):
     :param vid:
     :return:
     """
-    return sch.get_context(vid).serialize(format='turtle')
+    with sch.graph_lock:
+        return sch.get_context(vid).serialize(format='turtle')
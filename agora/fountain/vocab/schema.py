@@ -23,28 +23,39 @@
 """
 
 import logging
+from threading import RLock
 
 from rdflib import ConjunctiveGraph, URIRef, BNode
 from rdflib.namespace import RDFS
 
+from agora.fountain.lazy import LazyObject
 from agora.fountain.server import app
 
 __author__ = 'Fernando Serena'
 
 log = logging.getLogger('agora.fountain.schema')
 
-store_mode = app.config['STORE']
-if 'persist' in store_mode:
-    graph = ConjunctiveGraph('Sleepycat')
-    graph.open('graph_store', create=True)
-else:
-    graph = ConjunctiveGraph()
-
-log.info('Loading ontology...'),
-graph.store.graph_aware = False
-log.debug('\n{}'.format(graph.serialize(format='turtle')))
-log.info('Ready')
 
+def __open_graph():
+    """
+    Open the ontology graph, in the configured store
+    :return:
+    """
+    log.info('Loading ontology...')
+    if 'persist' in app.config['STORE']:
+        g = ConjunctiveGraph('Sleepycat')
+        g.open('graph_store', create=True)
+    else:
+        g = ConjunctiveGraph()
+    g.store.graph_aware = False
+    log.info('Ready')
+    return g
+
+
+# The ontology graph is opened on first use. It is modified by request threads and analysed by the job worker,
+# so both hold this lock while they do
+graph = LazyObject(__open_graph)
+graph_lock = RLock()
 _namespaces = {}
 _prefixes = {}
 